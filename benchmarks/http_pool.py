@@ -0,0 +1,126 @@
+"""
+Сравнение общего пула соединений MyTonClient с клиентом на каждый запрос.
+
+Запуск из корня репозитория: python -m benchmarks.http_pool
+Запросы идут к локальному серверу-заглушке вместо api.ston.fi. Заглушка
+считает принятые соединения (каждое - это TCP handshake) и перед обработкой
+нового соединения ждет --handshake-delay секунд: так имитируется TLS handshake
+к удаленному API, которого на localhost нет.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Awaitable, Callable, List
+
+import httpx
+
+from service.app.ton_wallet import MyTonClient
+
+RESPONSE = (
+    b"HTTP/1.1 200 OK\r\n"
+    b"Content-Type: application/json\r\n"
+    b"Content-Length: 20\r\n"
+    b"Connection: keep-alive\r\n"
+    b"\r\n"
+    b'{"swap_rate": "1.0"}'
+)
+
+
+class StandInServer:
+    def __init__(self, handshake_delay: float):
+        self.handshake_delay = handshake_delay
+        self.connections = 0
+        self.requests = 0
+        self._server = None
+
+    async def start(self) -> str:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}/v1/swap/simulate"
+
+    async def stop(self) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader, writer) -> None:
+        self.connections += 1
+        await asyncio.sleep(self.handshake_delay)
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                if not head:
+                    break
+                self.requests += 1
+                writer.write(RESPONSE)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+async def fresh_client_request(url: str) -> None:
+    # Поведение до общего пула: новый клиент и новое соединение на каждый запрос
+    async with httpx.AsyncClient() as client:
+        (await client.post(url)).raise_for_status()
+
+
+def pooled_request(http: httpx.AsyncClient) -> Callable[[str], Awaitable[None]]:
+    async def request(url: str) -> None:
+        (await http.post(url)).raise_for_status()
+
+    return request
+
+
+async def run_case(
+    request: Callable[[str], Awaitable[None]],
+    url: str,
+    total: int,
+    concurrency: int,
+) -> List[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one() -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            await request(url)
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one() for _ in range(total)))
+    return latencies
+
+
+def report(name: str, latencies: List[float], server: StandInServer, wall: float):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(
+        f"{name:<8} requests={server.requests:<5} handshakes={server.connections:<5} "
+        f"mean={statistics.mean(latencies) * 1000:7.2f} ms "
+        f"p50={statistics.median(latencies) * 1000:7.2f} ms "
+        f"p95={p95 * 1000:7.2f} ms total={wall:6.2f} s"
+    )
+
+
+async def main(args) -> None:
+    cases = [("fresh", None), ("pooled", MyTonClient.create_http_client())]
+    for name, http in cases:
+        server = StandInServer(args.handshake_delay)
+        url = await server.start()
+        request = fresh_client_request if http is None else pooled_request(http)
+        started = time.perf_counter()
+        latencies = await run_case(request, url, args.requests, args.concurrency)
+        report(name, latencies, server, time.perf_counter() - started)
+        if http is not None:
+            await http.aclose()
+        await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--handshake-delay", type=float, default=0.02)
+    asyncio.run(main(parser.parse_args()))
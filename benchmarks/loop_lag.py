@@ -0,0 +1,69 @@
+"""
+Задержка event loop при 100 параллельных созданиях кошелька.
+
+Запуск из корня репозитория: python -m benchmarks.loop_lag
+Каждый вызов - криптография /wallet/create при пустом пуле кошельков
+(generate_wallet_record: генерация мнемоники и ключей, два шифрования Fernet)
+в режимах CRYPTO_EXECUTOR inline (как до выноса в пул), thread и process.
+Запросы к БД в маршруте - ожидание ввода-вывода, loop они не блокируют,
+поэтому сравнение делается без БД. Параллельно работает зонд: он засыпает на
+--probe-interval и записывает, насколько позже срока проснулся.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+from service.app import executor
+from service.app.config import settings
+from service.app.ton_wallet import MyTonClient
+from service.app.wallet_pool import generate_wallet_record
+
+
+async def probe(interval: float, lags: List[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - started - interval)
+
+
+async def run_mode(mode: str, calls: int, interval: float) -> None:
+    settings.CRYPTO_EXECUTOR = mode
+    executor.shutdown_executor()
+    ton_client = MyTonClient()
+    # Прогрев пула, чтобы запуск процессов не попал в замер
+    await generate_wallet_record(ton_client)
+
+    lags: List[float] = []
+    stop = asyncio.Event()
+    prober = asyncio.create_task(probe(interval, lags, stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(generate_wallet_record(ton_client) for _ in range(calls)))
+    total = time.perf_counter() - started
+    stop.set()
+    await prober
+    await ton_client.aclose()
+    executor.shutdown_executor()
+
+    lags.sort()
+    p99 = lags[max(int(len(lags) * 0.99) - 1, 0)]
+    print(
+        f"{mode:<8} calls={calls} total={total:6.2f} s probes={len(lags):<5} "
+        f"lag mean={statistics.mean(lags) * 1000:8.2f} ms "
+        f"p99={p99 * 1000:8.2f} ms max={lags[-1] * 1000:8.2f} ms"
+    )
+
+
+async def main(args) -> None:
+    for mode in args.modes:
+        await run_mode(mode, args.calls, args.probe_interval)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=100)
+    parser.add_argument("--probe-interval", type=float, default=0.005)
+    parser.add_argument("--modes", nargs="+", default=["inline", "thread", "process"])
+    asyncio.run(main(parser.parse_args()))
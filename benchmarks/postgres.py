@@ -0,0 +1,124 @@
+"""
+Временная схема Postgres для бенчмарков с БД.
+
+Бенчмарки работают с Postgres из docker-compose (настройки DATABASE_*) в
+отдельной схеме: в ней создаются таблицы сервиса, после замера схема
+удаляется. Если Postgres недоступен, бенчмарк пропускается.
+"""
+
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from service.app.database import DATABASE_URL
+from service.app.models import Base
+
+
+class PostgresUnavailable(Exception):
+    """Postgres из настроек DATABASE_* недоступен."""
+
+
+@asynccontextmanager
+async def scratch_schema() -> AsyncIterator[Tuple[AsyncEngine, str]]:
+    """Движок, все соединения которого работают во временной схеме с таблицами."""
+    schema = f"bench_{uuid.uuid4().hex[:12]}"
+    admin = create_async_engine(DATABASE_URL, poolclass=NullPool)
+    try:
+        async with admin.begin() as conn:
+            await conn.execute(text(f'CREATE SCHEMA "{schema}"'))
+    except Exception as e:
+        await admin.dispose()
+        raise PostgresUnavailable(str(e)) from e
+
+    engine = create_async_engine(
+        DATABASE_URL, connect_args={"server_settings": {"search_path": schema}}
+    )
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        yield engine, schema
+    finally:
+        await engine.dispose()
+        async with admin.begin() as conn:
+            await conn.execute(text(f'DROP SCHEMA "{schema}" CASCADE'))
+        await admin.dispose()
+
+
+async def seed_orders(
+    conn: AsyncConnection,
+    total: int,
+    wallets: int,
+    open_orders: int = 0,
+    pending: int = 0,
+    executing: int = 0,
+    lease_owner: str = None,
+) -> None:
+    """
+    Пользователи с кошельками и total ордеров, распределенных по кошелькам
+    по кругу: первые open_orders - CREATED (в аренде lease_owner, если задан),
+    затем pending PENDING и executing EXECUTING, остальные - история
+    (EXECUTED, каждый десятый FAILED).
+    """
+    # Числа подставляются в текст запроса: у параметров в арифметике
+    # generate_series Postgres не может вывести тип
+    total, wallets = int(total), int(wallets)
+    pending_end = int(open_orders) + int(pending)
+    executing_end = pending_end + int(executing)
+    params = {"owner": lease_owner}
+    await conn.execute(
+        text(
+            "INSERT INTO users (telegram_user_id) "
+            f"SELECT 'bench-' || g FROM generate_series(1, {wallets}) g"
+        )
+    )
+    await conn.execute(
+        text(
+            "INSERT INTO wallets (address, private_key, mnemonic, balance, user_id, "
+            "lease_owner, lease_expires_at) "
+            "SELECT 'EQ-bench-' || g, 'key', 'mnemonic', '0', g, "
+            "CAST(:owner AS varchar), "
+            "CASE WHEN CAST(:owner AS varchar) IS NOT NULL "
+            "THEN now() + interval '1 hour' END "
+            f"FROM generate_series(1, {wallets}) g"
+        ),
+        params,
+    )
+    await conn.execute(
+        text(
+            "INSERT INTO orders (order_id, order_type, price, volume, timestamp, "
+            "status, tx_hash, jetton_address, wallet_id, lease_owner, "
+            "lease_expires_at) "
+            "SELECT md5(g::text), "
+            "CASE WHEN g % 2 = 0 THEN 'BUY' ELSE 'SELL' END, "
+            "1 + random(), 1 + g % 10, now() - g * interval '1 second', status, "
+            "CASE WHEN status <> 'CREATED' THEN md5('tx' || g) END, "
+            f"'EQ-jetton-' || g % 50, 1 + g % {wallets}, "
+            "CASE WHEN status = 'CREATED' THEN CAST(:owner AS varchar) END, "
+            "CASE WHEN status = 'CREATED' AND CAST(:owner AS varchar) IS NOT NULL "
+            "THEN now() + interval '1 hour' END "
+            "FROM ("
+            "  SELECT g, CASE"
+            f"    WHEN g <= {int(open_orders)} THEN 'CREATED'"
+            f"    WHEN g <= {pending_end} THEN 'PENDING'"
+            f"    WHEN g <= {executing_end} THEN 'EXECUTING'"
+            "    WHEN g % 10 = 0 THEN 'FAILED'"
+            "    ELSE 'EXECUTED' END AS status"
+            f"  FROM generate_series(1, {total}) g"
+            ") s"
+        ),
+        params,
+    )
+    await conn.execute(text("ANALYZE"))
+
+
+def run(main, args) -> None:
+    """Запускает бенчмарк; без Postgres сообщает о пропуске."""
+    try:
+        asyncio.run(main(args))
+    except PostgresUnavailable as e:
+        print(f"Postgres недоступен, бенчмарк пропущен: {e}")
@@ -0,0 +1,167 @@
+"""
+Время БД на переходы статусов за тик: групповая запись против commit на ордер.
+
+Запуск из корня репозитория: python -m benchmarks.status_writes
+Нужен Postgres из docker-compose (настройки DATABASE_*): таблицы создаются во
+временной схеме и удаляются после замера, без Postgres бенчмарк пропускается.
+В книге --open открытых ордеров, за тик срабатывают --triggered из них. Каждый
+сработавший ордер проходит оба перехода тика: EXECUTING -> PENDING после
+отправки свопа и PENDING -> EXECUTED/FAILED в мониторинге транзакций.
+
+- per-order: прежняя запись, UPDATE и commit на каждый ордер и переход;
+- grouped: StatusWriter.submit для всех ордеров тика (пачка на запись) и один
+  UPDATE с case, как в TxMonitor.run.
+
+Запись outbox (write_intent) перед отправкой одинакова в обоих режимах и не
+замеряется.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Dict, List
+from unittest import mock
+
+from sqlalchemy import case, event, text, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from benchmarks.postgres import run, scratch_schema, seed_orders
+from service.app import status_writer
+from service.app.models import Order
+from service.app.notifications import record_status_changes
+from service.app.schemas import OrderStatus
+
+
+class Row:
+    """Ордер, переданный в StatusWriter: нужен только id."""
+
+    def __init__(self, order_id: int):
+        self.id = order_id
+
+
+def final_statuses(order_ids: List[int]) -> Dict[int, str]:
+    return {
+        order_id: (
+            OrderStatus.FAILED.value
+            if order_id % 10 == 0
+            else OrderStatus.EXECUTED.value
+        )
+        for order_id in order_ids
+    }
+
+
+async def per_order(sessions, order_ids: List[int], concurrency: int) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def transition(order_id: int, status: str, expected: str) -> None:
+        async with semaphore, sessions() as session:
+            result = await session.execute(
+                update(Order)
+                .where(Order.id == order_id, Order.status == expected)
+                .values(status=status)
+                .returning(Order.id)
+            )
+            await record_status_changes(session, result.scalars().all())
+            await session.commit()
+
+    await asyncio.gather(
+        *(
+            transition(order_id, OrderStatus.PENDING.value, OrderStatus.EXECUTING.value)
+            for order_id in order_ids
+        )
+    )
+    await asyncio.gather(
+        *(
+            transition(order_id, status, OrderStatus.PENDING.value)
+            for order_id, status in final_statuses(order_ids).items()
+        )
+    )
+
+
+async def grouped(sessions, order_ids: List[int], concurrency: int) -> None:
+    writer = status_writer.StatusWriter()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def submit(order_id: int) -> None:
+        async with semaphore:
+            await writer.submit(Row(order_id), f"tx-{order_id}")
+
+    with mock.patch.object(status_writer, "async_session", sessions):
+        await asyncio.gather(*(submit(order_id) for order_id in order_ids))
+
+    statuses = final_statuses(order_ids)
+    async with sessions() as session:
+        result = await session.execute(
+            update(Order)
+            .where(
+                Order.id.in_(statuses),
+                Order.status == OrderStatus.PENDING.value,
+            )
+            .values(status=case(statuses, value=Order.id))
+            .returning(Order.id)
+            .execution_options(synchronize_session=False)
+        )
+        await record_status_changes(session, result.scalars().all())
+        await session.commit()
+
+
+async def reset(engine, triggered: int) -> None:
+    """Возвращает сработавшие ордера в EXECUTING, как после write_intent."""
+    async with engine.begin() as conn:
+        await conn.execute(
+            text(
+                "UPDATE orders SET status = 'EXECUTING', tx_hash = 'tx-' || id "
+                "WHERE id <= :triggered"
+            ),
+            {"triggered": triggered},
+        )
+        await conn.execute(text("DELETE FROM order_notifications"))
+
+
+async def main(args) -> None:
+    async with scratch_schema() as (engine, _):
+        async with engine.begin() as conn:
+            await seed_orders(conn, args.open, args.wallets, open_orders=args.open)
+        sessions = async_sessionmaker(engine, expire_on_commit=False)
+        commits = 0
+
+        def count_commit(_):
+            nonlocal commits
+            commits += 1
+
+        event.listen(engine.sync_engine, "commit", count_commit)
+        order_ids = list(range(1, args.triggered + 1))
+        modes = {"per-order": per_order, "grouped": grouped}
+        timings = {mode: [] for mode in modes}
+        commit_counts = {}
+        for _ in range(args.repeats):
+            for mode, write in modes.items():
+                await reset(engine, args.triggered)
+                commits = 0
+                started = time.perf_counter()
+                await write(sessions, order_ids, args.concurrency)
+                timings[mode].append(time.perf_counter() - started)
+                commit_counts[mode] = commits
+
+        print(
+            f"open={args.open} triggered={args.triggered} "
+            f"concurrency={args.concurrency} repeats={args.repeats}"
+        )
+        for mode in modes:
+            print(
+                f"{mode:<10} db time per tick median="
+                f"{statistics.median(timings[mode]) * 1000:9.2f} ms "
+                f"max={max(timings[mode]) * 1000:9.2f} ms "
+                f"commits={commit_counts[mode]}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--open", type=int, default=10_000)
+    parser.add_argument("--triggered", type=int, default=1_000)
+    parser.add_argument("--wallets", type=int, default=1_000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--repeats", type=int, default=5)
+    run(main, parser.parse_args())
@@ -0,0 +1,132 @@
+"""
+Планы и время запросов тика на таблице ордеров с историей в 1M строк.
+
+Запуск из корня репозитория: python -m benchmarks.tick_query
+Нужен Postgres из docker-compose (настройки DATABASE_*): таблицы создаются во
+временной схеме и удаляются после замера, без Postgres бенчмарк пропускается.
+Каждый запрос выполняется через EXPLAIN (ANALYZE, FORMAT JSON) с частичными
+индексами ордеров и после их удаления; печатается медиана Execution Time и
+узлы плана, читающие orders.
+"""
+
+import argparse
+import json
+import statistics
+from typing import List
+
+from sqlalchemy import select, text
+from sqlalchemy.dialects import postgresql
+
+from benchmarks.postgres import run, scratch_schema, seed_orders
+from service.app.models import Order, OrderStatus, SwapIntent, Wallet
+from service.app.trigger_book import BookOrder
+
+ORDER_INDEXES = [
+    "ix_orders_open",
+    "ix_orders_pending",
+    "ix_orders_wallet_timestamp",
+    "ix_orders_executing",
+]
+
+
+def tick_queries(wallet_id: int):
+    """Запросы тика и маршрутов в том виде, в каком их строит сервис."""
+    return {
+        # load_trigger_book
+        "open orders": select(
+            *(getattr(Order, field) for field in BookOrder._fields)
+        ).where(Order.status == OrderStatus.CREATED.value),
+        # TxMonitor.run
+        "pending orders": select(
+            Order.id, Order.order_id, Order.tx_hash, Wallet.address, SwapIntent.seqno
+        )
+        .join(Wallet, Wallet.id == Order.wallet_id)
+        .outerjoin(SwapIntent, SwapIntent.message_hash == Order.tx_hash)
+        .where(
+            Order.tx_hash.isnot(None),
+            Order.status == OrderStatus.PENDING.value,
+        ),
+        # GET /orders, первая страница
+        "orders page": select(Order)
+        .where(Order.wallet_id == wallet_id)
+        .order_by(Order.timestamp.desc(), Order.id.desc())
+        .limit(21),
+    }
+
+
+def scan_nodes(plan: dict) -> List[str]:
+    """Узлы плана, читающие таблицу orders."""
+    nodes = []
+    if plan.get("Relation Name") == "orders":
+        # у Bitmap Heap Scan индекс указан в дочернем Bitmap Index Scan
+        indexes = [plan["Index Name"]] if "Index Name" in plan else []
+        indexes += [
+            child["Index Name"]
+            for child in plan.get("Plans", [])
+            if child["Node Type"] == "Bitmap Index Scan"
+        ]
+        node = plan["Node Type"]
+        if indexes:
+            node += f" ({', '.join(indexes)})"
+        nodes.append(node)
+    for child in plan.get("Plans", []):
+        nodes.extend(scan_nodes(child))
+    return nodes
+
+
+async def measure(conn, label: str, query, repeats: int) -> None:
+    sql = str(
+        query.compile(
+            dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+        )
+    )
+    timings = []
+    for _ in range(repeats):
+        result = await conn.execute(text(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}"))
+        report = result.scalar_one()
+        if isinstance(report, str):
+            report = json.loads(report)
+        timings.append(report[0]["Execution Time"])
+    nodes = ", ".join(scan_nodes(report[0]["Plan"]))
+    print(
+        f"  {label:<16} median={statistics.median(timings):9.2f} ms "
+        f"max={max(timings):9.2f} ms  {nodes}"
+    )
+
+
+async def main(args) -> None:
+    async with scratch_schema() as (engine, _):
+        async with engine.begin() as conn:
+            await seed_orders(
+                conn,
+                args.orders,
+                args.wallets,
+                open_orders=args.open,
+                pending=args.pending,
+            )
+        print(
+            f"orders={args.orders} wallets={args.wallets} open={args.open} "
+            f"pending={args.pending} repeats={args.repeats}"
+        )
+        queries = tick_queries(wallet_id=1)
+        async with engine.connect() as conn:
+            print("с индексами:")
+            for label, query in queries.items():
+                await measure(conn, label, query, args.repeats)
+            for index in ORDER_INDEXES:
+                await conn.execute(text(f"DROP INDEX {index}"))
+            await conn.execute(text("ANALYZE orders"))
+            print("без индексов:")
+            for label, query in queries.items():
+                await measure(conn, label, query, args.repeats)
+            await conn.rollback()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    parser.add_argument("--wallets", type=int, default=10_000)
+    parser.add_argument("--open", type=int, default=1_000)
+    parser.add_argument("--pending", type=int, default=100)
+    parser.add_argument("--repeats", type=int, default=7)
+    run(main, parser.parse_args())
@@ -0,0 +1,84 @@
+"""
+Память при загрузке индекса срабатывания: ORM-объекты против потока колонок.
+
+Запуск из корня репозитория: python -m benchmarks.trigger_book_memory
+Нужен Postgres из docker-compose (настройки DATABASE_*): таблицы создаются во
+временной схеме и удаляются после замера, без Postgres бенчмарк пропускается.
+
+- orm: прежняя загрузка, select(Order) и все строки как ORM-объекты;
+- stream: load_trigger_book, только колонки BookOrder потоком через серверный
+  курсор (yield_per).
+
+tracemalloc считает пик памяти во время загрузки и память, которая остается
+занятой загруженным индексом.
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+from unittest import mock
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from benchmarks.postgres import run, scratch_schema, seed_orders
+from service.app import scheduler
+from service.app.models import Order
+from service.app.schemas import OrderStatus
+from service.app.trigger_book import BookOrder, TriggerBook
+
+
+async def orm_load(sessions) -> TriggerBook:
+    book = TriggerBook()
+    async with sessions() as session:
+        result = await session.execute(
+            select(Order).where(Order.status == OrderStatus.CREATED.value)
+        )
+        book.load(BookOrder.from_order(order) for order in result.scalars())
+    return book
+
+
+async def stream_load(sessions) -> TriggerBook:
+    book = TriggerBook()
+    with mock.patch.object(scheduler, "async_session", sessions), mock.patch.object(
+        scheduler, "trigger_book", book
+    ):
+        await scheduler.load_trigger_book()
+    return book
+
+
+async def main(args) -> None:
+    async with scratch_schema() as (engine, _):
+        async with engine.begin() as conn:
+            await seed_orders(conn, args.orders, args.wallets, open_orders=args.open)
+        sessions = async_sessionmaker(engine)
+        # Прогрев: соединение пула и кэш компиляции запросов не входят в замер
+        await orm_load(sessions)
+        await stream_load(sessions)
+
+        print(f"orders={args.orders} open={args.open}")
+        for mode, load in (("orm", orm_load), ("stream", stream_load)):
+            gc.collect()
+            tracemalloc.start()
+            baseline = tracemalloc.get_traced_memory()[0]
+            started = time.perf_counter()
+            book = await load(sessions)
+            elapsed = time.perf_counter() - started
+            gc.collect()
+            retained, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(
+                f"{mode:<7} orders={len(book)} time={elapsed:6.2f} s "
+                f"peak={(peak - baseline) / 2**20:8.1f} MiB "
+                f"retained={(retained - baseline) / 2**20:8.1f} MiB"
+            )
+            del book
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--open", type=int, default=100_000)
+    parser.add_argument("--orders", type=int, default=200_000)
+    parser.add_argument("--wallets", type=int, default=10_000)
+    run(main, parser.parse_args())
@@ -4,6 +4,19 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     BOT_TOKEN: str = "BOT_TOKEN"
     SERVICE_URL: str = "http://127.0.0.1:8000"
+    SERVICE_TIMEOUT: float = 10.0
+    SERVICE_RETRIES: int = 2
+    SERVICE_RETRY_BACKOFF: float = 0.2
+    SERVICE_MAX_CONNECTIONS: int = 20
+    NOTIFICATIONS_ENABLED: bool = True
+    NOTIFICATIONS_POLL_TIMEOUT: float = 25.0
+    NOTIFICATIONS_BATCH: int = 100
+    # Telegram allows about 30 messages per second per bot and 1 per second per chat
+    NOTIFICATIONS_RATE: float = 25.0
+    NOTIFICATIONS_CHAT_INTERVAL: float = 1.0
+    NOTIFICATIONS_RETRIES: int = 3
+    NOTIFICATIONS_RETRY_BACKOFF: float = 1.0
+    NOTIFICATIONS_ERROR_BACKOFF: float = 5.0
 
     class Config:
         env_file = ".env"
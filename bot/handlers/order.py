@@ -1,4 +1,5 @@
-import httpx
+import math
+
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import (
     CallbackContext,
@@ -8,7 +9,6 @@ from telegram.ext import (
     filters,
 )
 
-from bot.config import settings
 from bot.handlers.order_update import (
     UPDATE_JETTON,
     UPDATE_PRICE,
@@ -26,6 +26,7 @@ from bot.keyboards import (
     get_order_detail_keyboard,
     get_orders_menu_keyboard,
 )
+from bot.service_client import get_service_client
 
 # Conversation states for order creation
 ORDER_TYPE, PRICE, VOLUME, JETTON_ADDRESS = range(4)
@@ -49,8 +50,11 @@ def get_order_type_keyboard() -> InlineKeyboardMarkup:
 # ---------------- Telegram Handlers ----------------
 
 
+ORDERS_PER_PAGE = 5
+
 STATUS_EMOJIS = {
     "CREATED": "🆕",
+    "EXECUTING": "🔄",
     "PENDING": "⏳",
     "EXECUTED": "✅",
     "FAILED": "❌",
@@ -73,22 +77,24 @@ async def orders_menu_handler(update: Update, context: CallbackContext) -> None:
         except Exception:
             page = 0
 
+    # Keyset pagination: the cursor that opens each page is remembered per user,
+    # callback_data only carries the page number.
+    cursors = context.user_data.setdefault("orders_cursors", [None])
+    if page >= len(cursors):
+        page = 0
+
     telegram_user_id = str(query.from_user.id)
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{settings.SERVICE_URL}/api/orders/{telegram_user_id}"
-            )
-            response.raise_for_status()
-            orders_data = response.json()
-
-        total_orders = len(orders_data)
-        orders_per_page = 5
-        start = page * orders_per_page
-        end = start + orders_per_page
-        page_orders = orders_data[start:end]
+        orders_page = await get_service_client(context).list_orders(
+            telegram_user_id, limit=ORDERS_PER_PAGE, cursor=cursors[page]
+        )
+        page_orders = orders_page["items"]
+        has_more = orders_page["has_more"]
+        del cursors[page + 1 :]
+        if has_more:
+            cursors.append(orders_page["next_cursor"])
 
-        if total_orders == 0:
+        if page == 0 and not page_orders:
             text = "You currently have no orders."
             keyboard = [
                 [InlineKeyboardButton("Create order", callback_data="order_create")],
@@ -120,7 +126,7 @@ async def orders_menu_handler(update: Update, context: CallbackContext) -> None:
                         "◀ Back", callback_data=f"menu_orders_{page - 1}"
                     )
                 )
-            if end < total_orders:
+            if has_more:
                 pagination_buttons.append(
                     InlineKeyboardButton(
                         "Forward ▶", callback_data=f"menu_orders_{page + 1}"
@@ -201,9 +207,11 @@ async def order_price_handler(update: Update, context: CallbackContext) -> int:
 async def order_volume_handler(update: Update, context: CallbackContext) -> int:
     try:
         volume = float(update.message.text.strip())
+        if not math.isfinite(volume) or volume <= 0:
+            raise ValueError
     except ValueError:
         await update.message.reply_text(
-            "The volume must be a number. Please enter the volume again:"
+            "The volume must be a positive number. Please enter the volume again:"
         )
         return VOLUME
     context.user_data["volume"] = volume
@@ -223,12 +231,9 @@ async def order_jetton_handler(update: Update, context: CallbackContext) -> int:
         "jetton_address": context.user_data["jetton_address"],
     }
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{settings.SERVICE_URL}/api/orders/{telegram_user_id}", json=order_data
-            )
-            response.raise_for_status()
-            created_order = response.json()
+        created_order = await get_service_client(context).create_order(
+            telegram_user_id, order_data
+        )
         text = (
             f"Order created successfully!\n"
             f"ID: {created_order.get('order_id')}\n"
@@ -267,12 +272,9 @@ async def order_detail_handler(update: Update, context: CallbackContext) -> None
     order_id = data.split("_", 2)[-1]
     telegram_user_id = str(query.from_user.id)
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{settings.SERVICE_URL}/api/orders/{telegram_user_id}/{order_id}"
-            )
-            response.raise_for_status()
-            order_data = response.json()
+        order_data = await get_service_client(context).get_order(
+            telegram_user_id, order_id
+        )
 
         # Extract the status from the order data
         status = order_data.get("status", "CREATED")
@@ -310,11 +312,7 @@ async def order_delete_handler(update: Update, context: CallbackContext) -> None
     order_id = data.split("_", 2)[-1]
     telegram_user_id = str(query.from_user.id)
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.delete(
-                f"{settings.SERVICE_URL}/api/orders/{telegram_user_id}/{order_id}"
-            )
-            response.raise_for_status()
+        await get_service_client(context).delete_order(telegram_user_id, order_id)
         await query.edit_message_text(
             text="Order deleted successfully.",
             reply_markup=get_orders_menu_keyboard(),
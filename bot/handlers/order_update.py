@@ -1,14 +1,15 @@
-import httpx
+import math
+
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import (
     CallbackContext,
     ConversationHandler,
 )
 
-from bot.config import settings
 from bot.keyboards import (
     get_orders_menu_keyboard,
 )
+from bot.service_client import get_service_client
 
 # New states for order update (starting from 100)
 UPDATE_TYPE, UPDATE_PRICE, UPDATE_VOLUME, UPDATE_JETTON = range(100, 104)
@@ -42,12 +43,9 @@ async def update_order_start(update: Update, context: CallbackContext) -> int:
     context.user_data["order_id"] = order_id
     telegram_user_id = str(query.from_user.id)
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{settings.SERVICE_URL}/api/orders/{telegram_user_id}/{order_id}"
-            )
-            response.raise_for_status()
-            order_data = response.json()
+        order_data = await get_service_client(context).get_order(
+            telegram_user_id, order_id
+        )
         context.user_data["current_order"] = order_data
     except Exception as e:
         await query.edit_message_text(
@@ -138,9 +136,11 @@ async def update_order_volume(update: Update, context: CallbackContext) -> int:
     else:
         try:
             new_volume = float(text)
+            if not math.isfinite(new_volume) or new_volume <= 0:
+                raise ValueError
         except ValueError:
             await update.message.reply_text(
-                "Volume must be a number. Enter a new volume or /skip:"
+                "Volume must be a positive number. Enter a new volume or /skip:"
             )
             return UPDATE_VOLUME
     context.user_data["new_volume"] = new_volume
@@ -176,13 +176,9 @@ async def update_order_jetton(update: Update, context: CallbackContext) -> int:
         "jetton_address": context.user_data["new_jetton"],
     }
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.put(
-                f"{settings.SERVICE_URL}/api/orders/{telegram_user_id}/{order_id}",
-                json=update_data,
-            )
-            response.raise_for_status()
-            result = response.json()
+        result = await get_service_client(context).update_order(
+            telegram_user_id, order_id, update_data
+        )
         updated_order = result.get("order")
         text = (
             f"Order updated successfully!\n"
@@ -1,9 +1,8 @@
-import httpx
 from telegram import Update
 from telegram.ext import CallbackContext, CallbackQueryHandler
 
-from bot.config import settings
 from bot.keyboards import get_main_menu_keyboard, get_wallet_info_keyboard
+from bot.service_client import get_service_client
 
 
 async def wallet_menu_handler(update: Update, context: CallbackContext) -> None:
@@ -20,12 +19,9 @@ async def wallet_menu_handler(update: Update, context: CallbackContext) -> None:
 
     telegram_user_id = str(query.from_user.id)
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{settings.SERVICE_URL}/api/wallet/create/{telegram_user_id}"
-            )
-            response.raise_for_status()
-            wallet_data = response.json()
+        wallet_data = await get_service_client(context).get_or_create_wallet(
+            telegram_user_id
+        )
 
         address = wallet_data.get("address", "DU8zLf...")
         balance = wallet_data.get("balance", "0 TON")
@@ -64,12 +60,7 @@ async def wallet_export_handler(update: Update, context: CallbackContext) -> Non
     await query.answer()
     telegram_user_id = str(query.from_user.id)
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{settings.SERVICE_URL}/api/wallet/export/{telegram_user_id}",
-            )
-            response.raise_for_status()
-            export_data = response.json()
+        export_data = await get_service_client(context).export_wallet(telegram_user_id)
         text = (
             f"Address: <code>{export_data.get('address')}</code>\n"
             f"Private key: <code>{export_data.get('mnemonic')}</code>\n"
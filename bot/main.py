@@ -7,13 +7,27 @@ from bot.config import settings
 from bot.handlers.common import register_common_handlers
 from bot.handlers.order import register_orders_handlers
 from bot.handlers.wallet import register_wallet_handlers
+from bot.notifications import start_notifications, stop_notifications
+from bot.service_client import close_service_client, init_service_client
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+async def post_init(app) -> None:
+    await init_service_client(app)
+    await start_notifications(app)
+
+
 def main():
-    app = ApplicationBuilder().token(settings.BOT_TOKEN).build()
+    app = (
+        ApplicationBuilder()
+        .token(settings.BOT_TOKEN)
+        .post_init(post_init)
+        .post_stop(stop_notifications)
+        .post_shutdown(close_service_client)
+        .build()
+    )
     app.bot_data["parse_mode"] = ParseMode.HTML
 
     register_common_handlers(app)
@@ -0,0 +1,172 @@
+import asyncio
+import html
+import logging
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+from telegram import Bot
+from telegram.constants import MessageLimit, ParseMode
+from telegram.error import (
+    BadRequest,
+    Forbidden,
+    NetworkError,
+    RetryAfter,
+    TelegramError,
+)
+from telegram.ext import Application
+
+from bot.config import settings
+from bot.handlers.order import STATUS_EMOJIS
+from bot.service_client import ServiceClient
+
+logger = logging.getLogger(__name__)
+
+
+class SendPacer:
+    """
+    Spaces out outgoing messages to stay under Telegram flood limits: a global
+    rate for the whole bot and a minimum interval between messages to one chat.
+    A RetryAfter from Telegram pauses all sending for the requested time.
+    """
+
+    def __init__(self, rate: float, chat_interval: float):
+        self.interval = 1 / rate
+        self.chat_interval = chat_interval
+        self._next_slot = 0.0
+        self._chat_next: Dict[str, float] = {}
+
+    async def wait(self, chat_id: str) -> None:
+        chat_at = self._chat_next.get(chat_id, 0.0)
+        if chat_at > time.monotonic():
+            await asyncio.sleep(chat_at - time.monotonic())
+        # Slots are reserved without awaiting, so concurrent senders never share one
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.interval
+        self._chat_next[chat_id] = slot + self.chat_interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def pause(self, seconds: float) -> None:
+        self._next_slot = max(self._next_slot, time.monotonic() + seconds)
+
+    def forget_idle_chats(self) -> None:
+        now = time.monotonic()
+        self._chat_next = {
+            chat_id: at for chat_id, at in self._chat_next.items() if at > now
+        }
+
+
+def format_notification(item: dict) -> str:
+    status = item["status"]
+    text = (
+        f"{STATUS_EMOJIS.get(status, '')} Order <code>{html.escape(item['order_id'])}</code> "
+        f"({item['order_type']} {item['volume']}): <b>{status}</b>"
+    )
+    if item.get("tx_hash"):
+        text += f"\nTx hash: <code>{html.escape(item['tx_hash'])}</code>"
+    return text
+
+
+def split_messages(parts: List[str]) -> List[str]:
+    """Joins notification texts into as few messages as Telegram allows."""
+    messages = []
+    current = ""
+    for part in parts:
+        candidate = f"{current}\n\n{part}" if current else part
+        if len(candidate) > MessageLimit.MAX_TEXT_LENGTH and current:
+            messages.append(current)
+            candidate = part
+        current = candidate
+    if current:
+        messages.append(current)
+    return messages
+
+
+class OrderNotifier:
+    """
+    Pushes order status changes to users instead of waiting for them to reopen
+    the orders menu.
+
+    Long-polls the service for status notifications, merges all notifications
+    of one user from a batch into a single message and sends the messages
+    paced by SendPacer. A batch is acknowledged after delivery, and the next
+    poll only starts once the acknowledgement went through, so a notification
+    is never sent twice by a running bot. A message Telegram refuses for good
+    (blocked bot, unknown chat) is dropped rather than retried forever.
+    """
+
+    def __init__(self, bot: Bot, service_client: ServiceClient):
+        self.bot = bot
+        self.service_client = service_client
+        self.pacer = SendPacer(
+            settings.NOTIFICATIONS_RATE, settings.NOTIFICATIONS_CHAT_INTERVAL
+        )
+        self._unacked: List[int] = []
+
+    async def run(self) -> None:
+        while True:
+            try:
+                if self._unacked:
+                    await self.service_client.ack_notifications(self._unacked)
+                    self._unacked = []
+                items = await self.service_client.poll_notifications(
+                    settings.NOTIFICATIONS_BATCH, settings.NOTIFICATIONS_POLL_TIMEOUT
+                )
+            except Exception as e:
+                logger.error(f"Error polling order notifications: {e}")
+                await asyncio.sleep(settings.NOTIFICATIONS_ERROR_BACKOFF)
+                continue
+            if items:
+                await self.deliver(items)
+                self._unacked = [item["id"] for item in items]
+
+    async def deliver(self, items: List[dict]) -> None:
+        by_user = defaultdict(list)
+        for item in items:
+            by_user[item["telegram_user_id"]].append(format_notification(item))
+        await asyncio.gather(
+            *(self._send_user(chat_id, parts) for chat_id, parts in by_user.items())
+        )
+        self.pacer.forget_idle_chats()
+
+    async def _send_user(self, chat_id: str, parts: List[str]) -> None:
+        for text in split_messages(parts):
+            await self._send(chat_id, text)
+
+    async def _send(self, chat_id: str, text: str) -> None:
+        for attempt in range(settings.NOTIFICATIONS_RETRIES + 1):
+            await self.pacer.wait(chat_id)
+            try:
+                await self.bot.send_message(
+                    chat_id=chat_id, text=text, parse_mode=ParseMode.HTML
+                )
+                return
+            except RetryAfter as e:
+                logger.warning(f"Telegram flood control, pausing for {e.retry_after}s")
+                self.pacer.pause(e.retry_after)
+            except (Forbidden, BadRequest) as e:
+                logger.info(f"Notification to chat {chat_id} dropped: {e}")
+                return
+            except NetworkError as e:
+                logger.warning(f"Error sending notification to chat {chat_id}: {e}")
+                await asyncio.sleep(settings.NOTIFICATIONS_RETRY_BACKOFF * 2**attempt)
+            except TelegramError as e:
+                logger.error(f"Notification to chat {chat_id} dropped: {e}")
+                return
+        logger.error(f"Gave up sending notification to chat {chat_id}")
+
+
+async def start_notifications(app: Application) -> None:
+    if not settings.NOTIFICATIONS_ENABLED:
+        return
+    notifier = OrderNotifier(app.bot, app.bot_data["service_client"])
+    app.bot_data["notifier_task"] = asyncio.create_task(notifier.run())
+
+
+async def stop_notifications(app: Application) -> None:
+    task = app.bot_data.pop("notifier_task", None)
+    if task is not None:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
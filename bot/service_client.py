@@ -0,0 +1,154 @@
+import asyncio
+import random
+from typing import Optional
+
+import httpx
+from telegram.ext import Application, CallbackContext
+
+from bot.config import settings
+
+RETRY_STATUS_CODES = {502, 503, 504}
+
+
+class ServiceClient:
+    """
+    Typed client for the wallet service API.
+
+    One instance is created per Application and shared by all handlers, so
+    requests reuse pooled keep-alive connections instead of paying the
+    connect cost on every button press. Idempotent GET requests are retried
+    with exponential backoff and full jitter; everything else, including the
+    wallet creation GET, is sent once.
+    """
+
+    def __init__(
+        self,
+        base_url: str = settings.SERVICE_URL,
+        timeout: float = settings.SERVICE_TIMEOUT,
+        retries: int = settings.SERVICE_RETRIES,
+        retry_backoff: float = settings.SERVICE_RETRY_BACKOFF,
+    ):
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self._client = httpx.AsyncClient(
+            base_url=f"{base_url}/api",
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=settings.SERVICE_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.SERVICE_MAX_CONNECTIONS,
+            ),
+        )
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    async def _get(self, url: str, **kwargs) -> httpx.Response:
+        for attempt in range(self.retries + 1):
+            last_attempt = attempt == self.retries
+            try:
+                response = await self._client.get(url, **kwargs)
+            except httpx.TransportError:
+                if last_attempt:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or last_attempt:
+                    response.raise_for_status()
+                    return response
+            await asyncio.sleep(random.uniform(0, self.retry_backoff * 2**attempt))
+
+    async def _send(self, method: str, url: str, **kwargs) -> httpx.Response:
+        response = await self._client.request(method, url, **kwargs)
+        response.raise_for_status()
+        return response
+
+    # ---------------- Wallet ----------------
+
+    async def get_or_create_wallet(self, telegram_user_id: str) -> dict:
+        # Not idempotent despite being a GET: a retry racing the still running
+        # original request could create the user or assign a wallet twice
+        response = await self._send("GET", f"/wallet/create/{telegram_user_id}")
+        return response.json()
+
+    async def export_wallet(self, telegram_user_id: str) -> dict:
+        response = await self._get(f"/wallet/export/{telegram_user_id}")
+        return response.json()
+
+    # ---------------- Orders ----------------
+
+    async def list_orders(
+        self,
+        telegram_user_id: str,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        status: Optional[str] = None,
+        order_type: Optional[str] = None,
+    ) -> dict:
+        """
+        Returns one page of orders, newest first:
+        {"items": [...], "next_cursor": ..., "has_more": ...}.
+        Pass next_cursor back as cursor to fetch the following page.
+        """
+        params = {"limit": limit}
+        if cursor is not None:
+            params["cursor"] = cursor
+        if status is not None:
+            params["status"] = status
+        if order_type is not None:
+            params["order_type"] = order_type
+        response = await self._get(f"/orders/{telegram_user_id}", params=params)
+        return response.json()
+
+    async def get_order(self, telegram_user_id: str, order_id: str) -> dict:
+        response = await self._get(f"/orders/{telegram_user_id}/{order_id}")
+        return response.json()
+
+    async def create_order(self, telegram_user_id: str, order_data: dict) -> dict:
+        response = await self._send(
+            "POST", f"/orders/{telegram_user_id}", json=order_data
+        )
+        return response.json()
+
+    async def update_order(
+        self, telegram_user_id: str, order_id: str, update_data: dict
+    ) -> dict:
+        response = await self._send(
+            "PUT", f"/orders/{telegram_user_id}/{order_id}", json=update_data
+        )
+        return response.json()
+
+    async def delete_order(self, telegram_user_id: str, order_id: str) -> dict:
+        response = await self._send("DELETE", f"/orders/{telegram_user_id}/{order_id}")
+        return response.json()
+
+    # ---------------- Notifications ----------------
+
+    async def poll_notifications(self, limit: int, timeout: float) -> list:
+        """
+        Long-polls unacknowledged order status notifications, oldest first.
+        Waits up to timeout seconds on the service side when there are none.
+        """
+        response = await self._get(
+            "/notifications",
+            params={"limit": limit, "timeout": timeout},
+            timeout=self.timeout + timeout,
+        )
+        return response.json()["items"]
+
+    async def ack_notifications(self, ids: list) -> dict:
+        response = await self._send("POST", "/notifications/ack", json={"ids": ids})
+        return response.json()
+
+
+def get_service_client(context: CallbackContext) -> ServiceClient:
+    return context.bot_data["service_client"]
+
+
+async def init_service_client(app: Application) -> None:
+    app.bot_data["service_client"] = ServiceClient()
+
+
+async def close_service_client(app: Application) -> None:
+    service_client = app.bot_data.pop("service_client", None)
+    if service_client is not None:
+        await service_client.aclose()
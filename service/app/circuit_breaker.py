@@ -0,0 +1,76 @@
+import time
+
+from service.app.metrics import metrics
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+_STATE_GAUGE = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpen(Exception):
+    """Внешний API признан недоступным, запрос отклонен без обращения к нему."""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker одного внешнего API.
+
+    После failure_threshold ошибок подряд (таймаут, сетевая ошибка, 5xx) цепь
+    размыкается: запросы сразу получают CircuitOpen, не занимая ни соединений,
+    ни лимита. Через reset_timeout пропускается ровно один пробный запрос
+    (half-open): успех замыкает цепь, ошибка снова размыкает ее.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    def _set_state(self, state: str) -> None:
+        self.state = state
+        metrics.set(f"circuit_{self.name}_state", _STATE_GAUGE[state])
+
+    def available(self) -> bool:
+        """Можно ли сейчас обращаться к API (цепь замкнута или пора пробовать)."""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            return time.monotonic() - self._opened_at >= self.reset_timeout
+        return not self._probe_in_flight
+
+    def before_call(self) -> None:
+        """Вызывается перед запросом; отклоняет его, если цепь разомкнута."""
+        if self.state == CLOSED:
+            return
+        if self.available():
+            # Пробный запрос half-open, остальные ждут его результата
+            self._set_state(HALF_OPEN)
+            self._probe_in_flight = True
+            return
+        metrics.inc(f"circuit_{self.name}_rejected")
+        raise CircuitOpen(f"{self.name}: внешний API недоступен")
+
+    def release(self) -> None:
+        """Исход запроса неизвестен (отмена): разрешает следующий пробный запрос."""
+        self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._probe_in_flight = False
+        if self.state != CLOSED:
+            self._set_state(CLOSED)
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._probe_in_flight = False
+        if self.state == HALF_OPEN or self._failures >= self.failure_threshold:
+            if self.state != OPEN:
+                metrics.inc(f"circuit_{self.name}_opened")
+            self._opened_at = time.monotonic()
+            self._set_state(OPEN)
@@ -7,14 +7,134 @@ class DatabaseSettings(BaseSettings):
     NAME: str = "mydb"
     USER_NAME: str = "myuser"
     PASSWORD: str = "mypassword"
+    POOL_SIZE: int = 5
+    MAX_OVERFLOW: int = 10
+
+
+class SchedulerSettings(BaseSettings):
+    # False - API-процесс не запускает движок ордеров (он работает в service.app.worker)
+    ENABLED: bool = True
+    # Интервал проверки ордеров; тик дольше интервала считается переполнением
+    TICK_INTERVAL: float = 1.0
+    BOOK_RELOAD_INTERVAL: float = 60.0
+    CONCURRENT: bool = True
+    CONCURRENCY: int = 16
+    ORDER_TIMEOUT: float = 30.0
+    # Сработавшие ордера одного кошелька отправляются одной транзакцией
+    BATCH_SWAPS: bool = True
+    # Неподтвержденный seqno кошелька сверяется с цепью через SEQNO_TIMEOUT секунд
+    # (больше срока действия сообщения SWAP_VALID_FOR)
+    SEQNO_TIMEOUT: float = 90.0
+    # Outbox свопов: срок действия подписанного сообщения, запас после него до
+    # возврата ордера в CREATED и период сверки незавершенных отправок с цепью
+    SWAP_VALID_FOR: int = 60
+    OUTBOX_GRACE: float = 30.0
+    OUTBOX_RECOVERY_INTERVAL: float = 30.0
+    # Аренда ордеров между воркерами; LEASE_TTL должен быть больше ORDER_TIMEOUT
+    WORKER_ID: str = ""
+    LEASE_TTL: float = 120.0
+    CLAIM_BATCH: int = 100
+    # Строк за одну выборку серверного курсора при сканировании ордеров
+    SCAN_BATCH: int = 1000
+    # Мониторинг транзакций: задержка проверки растет от BASE до MAX,
+    # после TX_HASH_FALLBACK_AFTER неудачных поисков - запрос по хэшу
+    TX_CHECK_BASE_INTERVAL: float = 1.0
+    TX_CHECK_MAX_INTERVAL: float = 60.0
+    TX_ACCOUNT_LIMIT: int = 50
+    TX_HASH_FALLBACK_AFTER: int = 5
+    # Кривая котировок рынка: QUOTE_CURVE_POINTS объемов на обновление (сетка
+    # сгущается до QUOTE_CURVE_MAX_POINTS), интерполяция только при расхождении
+    # соседних точек <= QUOTE_CURVE_MAX_ERROR
+    QUOTE_CURVE_ENABLED: bool = True
+    QUOTE_CURVE_POINTS: int = 5
+    QUOTE_CURVE_MAX_POINTS: int = 16
+    QUOTE_CURVE_TTL: float = 30.0
+    QUOTE_CURVE_MAX_ERROR: float = 0.005
+    # Адаптивный опрос: ключ котировки проверяется не реже POLL_MAX_INTERVAL и
+    # не чаще POLL_MIN_INTERVAL, в зависимости от расстояния до ближайшего ордера
+    # и волатильности жетона (POLL_SAFETY - запас по скорости движения цены,
+    # POLL_MIN_VOLATILITY - нижняя граница дисперсии относительной цены в секунду)
+    ADAPTIVE_POLLING: bool = True
+    POLL_MIN_INTERVAL: float = 1.0
+    POLL_MAX_INTERVAL: float = 60.0
+    POLL_SAFETY: float = 3.0
+    POLL_VOLATILITY_ALPHA: float = 0.2
+    POLL_MIN_VOLATILITY: float = 1e-7
+
+    class Config:
+        env_prefix = "SCHEDULER_"
+
+
+class HttpSettings(BaseSettings):
+    HTTP2: bool = False
+    MAX_CONNECTIONS: int = 100
+    MAX_KEEPALIVE_CONNECTIONS: int = 20
+    KEEPALIVE_EXPIRY: float = 30.0
+    CONNECT_TIMEOUT: float = 5.0
+    READ_TIMEOUT: float = 10.0
+    POOL_TIMEOUT: float = 5.0
+
+    class Config:
+        env_prefix = "HTTP_"
+
+
+class RateLimitSettings(BaseSettings):
+    # Запросов в секунду и размер пачки на каждый внешний API; RPS=0 - без лимита
+    STONFI_RPS: float = 10.0
+    STONFI_BURST: int = 20
+    TONAPI_RPS: float = 10.0
+    TONAPI_BURST: int = 10
+    # Пауза после 429 без заголовка Retry-After
+    DEFAULT_RETRY_AFTER: float = 1.0
+    # Дедлайны запросов по эндпоинтам, секунды
+    QUOTE_DEADLINE: float = 2.0
+    TX_STATUS_DEADLINE: float = 3.0
+    TONAPI_DEADLINE: float = 5.0
+    # Circuit breaker: ошибок подряд до размыкания и пауза до пробного запроса
+    BREAKER_FAILURES: int = 5
+    BREAKER_RESET_TIMEOUT: float = 15.0
+
+    class Config:
+        env_prefix = "RATE_LIMIT_"
+
+
+class WalletPoolSettings(BaseSettings):
+    ENABLED: bool = True
+    LOW_WATER: int = 20
+    TARGET: int = 100
+    BATCH: int = 20
+    REFILL_INTERVAL: float = 10.0
+
+    class Config:
+        env_prefix = "WALLET_POOL_"
+
+
+class NotificationSettings(BaseSettings):
+    # Предельное время ожидания long-poll запроса уведомлений, с
+    MAX_POLL_TIMEOUT: float = 30.0
+    # Перепроверка БД во время ожидания на случай потерянного NOTIFY, с
+    RECHECK_INTERVAL: float = 5.0
+
+    class Config:
+        env_prefix = "NOTIFICATIONS_"
 
 
 class Settings(BaseSettings):
     DATABASE: DatabaseSettings = DatabaseSettings()
+    SCHEDULER: SchedulerSettings = SchedulerSettings()
+    HTTP: HttpSettings = HttpSettings()
+    RATE_LIMIT: RateLimitSettings = RateLimitSettings()
+    WALLET_POOL: WalletPoolSettings = WalletPoolSettings()
+    NOTIFICATIONS: NotificationSettings = NotificationSettings()
     ENCRYPTION_KEY: bytes = b"9kMeuf46Mdf1dGXHb_snUoxGPKolNRIJqR4JVrdxrV0="
     TON_API_KEY: str = (
         "TON_API_KEY"
     )
+    CRYPTO_EXECUTOR: str = "thread"
+    CRYPTO_WORKERS: int = 4
+    WALLET_CACHE_SIZE: int = 1024
+    WALLET_CACHE_TTL: float = 600.0
+    METRICS_LOG_INTERVAL: float = 60.0
 
     class Config:
         env_file = ".env"
@@ -1,5 +1,9 @@
+from pathlib import Path
 from typing import Any, AsyncGenerator
 
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import func, inspect, select
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
@@ -10,10 +14,40 @@ DATABASE_URL = (
     f"postgresql+asyncpg://{db.USER_NAME}:{db.PASSWORD}@{db.HOST}:{db.PORT}/{db.NAME}"
 )
 
-engine = create_async_engine(DATABASE_URL, echo=False)
+engine = create_async_engine(
+    DATABASE_URL, echo=False, pool_size=db.POOL_SIZE, max_overflow=db.MAX_OVERFLOW
+)
 async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 
 async def get_db() -> AsyncGenerator[Any, Any]:
     async with async_session() as session:
         yield session
+
+
+ALEMBIC_INI = Path(__file__).resolve().parents[1] / "alembic.ini"
+
+# Ключ advisory lock: миграции применяет только один процесс одновременно
+MIGRATIONS_LOCK_ID = 7_340_003
+
+
+def _upgrade(connection) -> None:
+    # Блокировка до конца транзакции миграций: процессы, стартующие
+    # одновременно, ждут друг друга, и следующий видит уже обновленную схему
+    connection.execute(select(func.pg_advisory_xact_lock(MIGRATIONS_LOCK_ID)))
+    config = Config(str(ALEMBIC_INI))
+    config.attributes["connection"] = connection
+    inspector = inspect(connection)
+    if inspector.has_table("orders") and not inspector.has_table("alembic_version"):
+        # Схема уже создана через create_all до появления миграций
+        command.stamp(config, "0001")
+    command.upgrade(config, "head")
+
+
+async def run_migrations() -> None:
+    """
+    Применяет миграции alembic до последней версии. Безопасно вызывать из
+    нескольких процессов сразу: миграции выполняются под advisory lock.
+    """
+    async with engine.begin() as conn:
+        await conn.run_sync(_upgrade)
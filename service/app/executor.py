@@ -0,0 +1,46 @@
+import asyncio
+import functools
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from service.app.config import settings
+
+_executor: Optional[Executor] = None
+
+
+def get_executor() -> Optional[Executor]:
+    """
+    Пул для CPU-тяжелой криптографии (вывод ключей, Fernet, создание кошельков).
+    CRYPTO_EXECUTOR: "thread" - пул потоков, "process" - пул процессов,
+    "inline" - выполнение прямо в event loop (как раньше).
+    """
+    global _executor
+    if _executor is None and settings.CRYPTO_EXECUTOR != "inline":
+        if settings.CRYPTO_EXECUTOR == "process":
+            _executor = ProcessPoolExecutor(max_workers=settings.CRYPTO_WORKERS)
+        elif settings.CRYPTO_EXECUTOR == "thread":
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.CRYPTO_WORKERS, thread_name_prefix="crypto"
+            )
+        else:
+            raise ValueError(f"Неизвестный CRYPTO_EXECUTOR: {settings.CRYPTO_EXECUTOR}")
+    return _executor
+
+
+async def run_cpu_bound(func: Callable[..., Any], *args) -> Any:
+    """
+    Выполняет func(*args) вне event loop.
+    Для пула процессов func и аргументы должны сериализоваться через pickle.
+    """
+    executor = get_executor()
+    if executor is None:
+        return func(*args)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(func, *args))
+
+
+def shutdown_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,118 @@
+import datetime
+import os
+import socket
+import uuid
+from typing import Iterable, List, NamedTuple
+
+from sqlalchemy import func, or_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from service.app.config import settings
+from service.app.models import Order, Wallet
+from service.app.schemas import OrderStatus
+
+# Уникален для каждого процесса: по нему видно, кто держит аренду ордера
+WORKER_ID = (
+    settings.SCHEDULER.WORKER_ID
+    or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+)
+
+
+class Claim(NamedTuple):
+    # id ордеров, которые теперь принадлежат этому воркеру
+    order_ids: List[int]
+    # Адреса кошельков, аренду которых воркер только что взял у другого воркера
+    # (или впервые): локальный учет seqno этих кошельков устарел
+    acquired_wallets: List[str]
+
+
+def lease_until():
+    return func.now() + datetime.timedelta(seconds=settings.SCHEDULER.LEASE_TTL)
+
+
+def lease_available(model):
+    return or_(
+        model.lease_expires_at.is_(None),
+        model.lease_expires_at < func.now(),
+        model.lease_owner == WORKER_ID,
+    )
+
+
+async def claim_orders(session: AsyncSession, order_ids: Iterable[int]) -> Claim:
+    """
+    Берет в аренду открытые ордера из order_ids вместе с их кошельками
+    (не больше SCHEDULER.CLAIM_BATCH кошельков).
+
+    Свопы подписываются seqno, который воркер ведет локально, поэтому все
+    ордера одного кошелька исполняет один воркер: сначала строки кошельков
+    выбираются через SELECT ... FOR UPDATE SKIP LOCKED и берутся в аренду, затем
+    в аренду берутся все переданные ордера этих кошельков. Кошелек, который
+    арендовал другой воркер, пропускается целиком. Аренда действует
+    SCHEDULER.LEASE_TTL секунд (у кошелька - не меньше срока действия его
+    отправленных сообщений, см. write_intent), после чего ордера и кошелек снова
+    может забрать любой воркер.
+    """
+    order_ids = list(order_ids)
+    if not order_ids:
+        return Claim([], [])
+
+    result = await session.execute(
+        select(Wallet.id, Wallet.address, Wallet.lease_owner)
+        .where(
+            Wallet.id.in_(
+                select(Order.wallet_id).where(
+                    Order.id.in_(order_ids),
+                    Order.status == OrderStatus.CREATED.value,
+                )
+            ),
+            lease_available(Wallet),
+        )
+        .order_by(Wallet.id)
+        .limit(settings.SCHEDULER.CLAIM_BATCH)
+        .with_for_update(skip_locked=True)
+    )
+    wallets = result.all()
+    if not wallets:
+        await session.commit()
+        return Claim([], [])
+
+    wallet_ids = [wallet.id for wallet in wallets]
+    await session.execute(
+        update(Wallet)
+        .where(Wallet.id.in_(wallet_ids))
+        .values(
+            lease_owner=WORKER_ID,
+            lease_expires_at=func.greatest(
+                func.coalesce(Wallet.lease_expires_at, func.now()), lease_until()
+            ),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    result = await session.execute(
+        update(Order)
+        .where(
+            Order.id.in_(order_ids),
+            Order.wallet_id.in_(wallet_ids),
+            Order.status == OrderStatus.CREATED.value,
+            lease_available(Order),
+        )
+        .values(lease_owner=WORKER_ID, lease_expires_at=lease_until())
+        .returning(Order.id)
+        .execution_options(synchronize_session=False)
+    )
+    claimed = result.scalars().all()
+    await session.commit()
+    acquired = [wallet.address for wallet in wallets if wallet.lease_owner != WORKER_ID]
+    return Claim(claimed, acquired)
+
+
+async def release_lease(session: AsyncSession, order_id: int) -> None:
+    """Снимает аренду ордера, если она принадлежит этому воркеру."""
+    await session.execute(
+        update(Order)
+        .where(Order.id == order_id, Order.lease_owner == WORKER_ID)
+        .values(lease_owner=None, lease_expires_at=None)
+        .execution_options(synchronize_session=False)
+    )
+    await session.commit()
@@ -1,26 +1,40 @@
 import uvicorn
-from database import engine
 from fastapi import FastAPI
-from models import Base
-from routes.order import router as order_router
-from routes.wallet import router as wallet_router
 
-from service.app.scheduler import start_scheduler
+from service.app.config import settings
+from service.app.database import run_migrations
+from service.app.executor import shutdown_executor
+from service.app.notifications import notification_hub
+from service.app.routes.metrics import router as metrics_router
+from service.app.routes.notifications import router as notifications_router
+from service.app.routes.order import router as order_router
+from service.app.routes.wallet import router as wallet_router
+from service.app.routes.wallet import ton_client
+from service.app.scheduler import start_scheduler, stop_scheduler
 
 app = FastAPI(title="TON Wallet Service")
 app.include_router(wallet_router, prefix="/api", tags=["Wallet"])
 app.include_router(order_router, prefix="/api", tags=["Order"])
+app.include_router(metrics_router, prefix="/api", tags=["Metrics"])
+app.include_router(notifications_router, prefix="/api", tags=["Notifications"])
 
 
 @app.on_event("startup")
 async def startup_event():
-    await start_scheduler()
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    await run_migrations()
+    notification_hub.start()
+    app.state.scheduler = None
+    if settings.SCHEDULER.ENABLED:
+        app.state.scheduler = await start_scheduler()
 
 
 @app.on_event("shutdown")
-async def shutdown_event(): ...
+async def shutdown_event():
+    if app.state.scheduler is not None:
+        await stop_scheduler(app.state.scheduler)
+    await notification_hub.stop()
+    await ton_client.aclose()
+    shutdown_executor()
 
 
 if __name__ == "__main__":
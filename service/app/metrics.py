@@ -0,0 +1,30 @@
+from collections import defaultdict
+from typing import Dict
+
+
+class Metrics:
+    """
+    Простые метрики процесса: счетчики и текущие значения.
+    Снимок доступен через GET /api/metrics и периодически пишется в лог движка.
+    """
+
+    def __init__(self):
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._gauges: Dict[str, float] = {}
+
+    def inc(self, name: str, value: float = 1.0) -> None:
+        self._counters[name] += value
+
+    def set(self, name: str, value: float) -> None:
+        self._gauges[name] = value
+
+    def get(self, name: str) -> float:
+        if name in self._gauges:
+            return self._gauges[name]
+        return self._counters.get(name, 0.0)
+
+    def snapshot(self) -> Dict[str, float]:
+        return {**self._counters, **self._gauges}
+
+
+metrics = Metrics()
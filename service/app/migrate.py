@@ -0,0 +1,29 @@
+"""
+Однократное применение миграций схемы БД.
+
+Запуск из корня репозитория: python -m service.app.migrate
+В docker-compose выполняется отдельным шагом: API и воркер стартуют только
+после его успешного завершения.
+"""
+
+import asyncio
+import logging
+
+from service.app.database import engine, run_migrations
+
+logger = logging.getLogger(__name__)
+
+
+async def migrate():
+    await run_migrations()
+    logger.info("Схема БД обновлена до последней миграции")
+    await engine.dispose()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(migrate())
+
+
+if __name__ == "__main__":
+    main()
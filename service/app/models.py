@@ -1,7 +1,19 @@
 import datetime
 import uuid
 
-from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, String
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    func,
+    text,
+)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
@@ -27,11 +39,19 @@ class Wallet(Base):
     private_key = Column(String, nullable=False)
     mnemonic = Column(String, nullable=False)
     balance = Column(String, default="0")
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    # Аренда кошелька воркером: свопы кошелька подписывает только его владелец
+    lease_owner = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
 
     owner = relationship("User", back_populates="wallets")
     orders = relationship("Order", back_populates="wallet")
 
+    # Кошельки без владельца - пул заранее созданных кошельков
+    __table_args__ = (
+        Index("ix_wallets_pool", "id", postgresql_where=text("user_id IS NULL")),
+    )
+
 
 class Order(Base):
     __tablename__ = "orders"
@@ -48,5 +68,67 @@ class Order(Base):
     tx_hash = Column(String, nullable=True)
     jetton_address = Column(String, nullable=True)
     wallet_id = Column(Integer, ForeignKey("wallets.id"), nullable=False)
+    lease_owner = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
 
     wallet = relationship("Wallet", back_populates="orders")
+
+    __table_args__ = (
+        Index(
+            "ix_orders_open",
+            "jetton_address",
+            "order_type",
+            "price",
+            postgresql_where=text("status = 'CREATED'"),
+        ),
+        Index(
+            "ix_orders_pending",
+            "wallet_id",
+            "id",
+            postgresql_where=text("status = 'PENDING' AND tx_hash IS NOT NULL"),
+        ),
+        Index("ix_orders_wallet_timestamp", "wallet_id", "timestamp", "id"),
+        Index(
+            "ix_orders_executing",
+            "tx_hash",
+            postgresql_where=text("status = 'EXECUTING'"),
+        ),
+    )
+
+
+class SwapIntent(Base):
+    """
+    Запись outbox: подписанное внешнее сообщение свопа, сохраненное до отправки.
+    Ордера сообщения (EXECUTING, после отправки PENDING) имеют tx_hash =
+    message_hash; запись удаляется, когда мониторинг транзакций записал
+    итоговый статус или сверка outbox вернула ордера в CREATED.
+    """
+
+    __tablename__ = "swap_intents"
+
+    id = Column(Integer, primary_key=True)
+    message_hash = Column(String, unique=True, nullable=False)
+    wallet_id = Column(Integer, ForeignKey("wallets.id"), nullable=False)
+    seqno = Column(Integer, nullable=False)
+    # Unix-время, после которого сообщение уже не может попасть в цепь
+    valid_until = Column(Integer, nullable=False)
+    boc = Column(Text, nullable=False)
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+
+
+class OrderNotification(Base):
+    """
+    Уведомление пользователя о смене статуса ордера. Пишется в одной транзакции
+    с самим переходом и удаляется, когда бот подтвердит доставку.
+    """
+
+    __tablename__ = "order_notifications"
+
+    id = Column(BigInteger, primary_key=True)
+    telegram_user_id = Column(String, nullable=False)
+    order_id = Column(String, nullable=False)
+    order_type = Column(String, nullable=False)
+    volume = Column(Float, nullable=False)
+    status = Column(String, nullable=False)
+    tx_hash = Column(String, nullable=True)
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
@@ -0,0 +1,117 @@
+import asyncio
+import time
+from typing import Collection, List
+
+from sqlalchemy import delete, func, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from service.app.config import settings
+from service.app.database import async_session
+from service.app.metrics import metrics
+from service.app.models import Order, OrderNotification, User, Wallet
+from service.app.order_events import ChannelListener
+
+NOTIFICATIONS_CHANNEL = "order_notifications"
+
+
+async def record_status_changes(session: AsyncSession, order_ids: Collection[int]):
+    """
+    Записывает уведомления о новом статусе ордеров в транзакции session.
+    Вызывается после UPDATE статуса, до commit: уведомление появляется вместе с
+    переходом, а NOTIFY будит ожидающие long-poll запросы только после commit.
+    """
+    if not order_ids:
+        return
+    await session.execute(
+        insert(OrderNotification).from_select(
+            [
+                "telegram_user_id",
+                "order_id",
+                "order_type",
+                "volume",
+                "status",
+                "tx_hash",
+            ],
+            select(
+                User.telegram_user_id,
+                Order.order_id,
+                Order.order_type,
+                Order.volume,
+                Order.status,
+                Order.tx_hash,
+            )
+            .join(Wallet, Wallet.id == Order.wallet_id)
+            .join(User, User.id == Wallet.user_id)
+            .where(Order.id.in_(order_ids))
+            .order_by(Order.id),
+        )
+    )
+    await session.execute(select(func.pg_notify(NOTIFICATIONS_CHANNEL, "")))
+    metrics.inc("notifications_recorded", len(order_ids))
+
+
+async def fetch_notifications(session: AsyncSession, limit: int) -> List:
+    """Самые старые неподтвержденные уведомления."""
+    result = await session.execute(
+        select(OrderNotification).order_by(OrderNotification.id).limit(limit)
+    )
+    return result.scalars().all()
+
+
+async def ack_notifications(session: AsyncSession, ids: Collection[int]) -> None:
+    """Удаляет доставленные уведомления."""
+    await session.execute(
+        delete(OrderNotification).where(OrderNotification.id.in_(ids))
+    )
+    await session.commit()
+    metrics.inc("notifications_acked", len(ids))
+
+
+class NotificationHub(ChannelListener):
+    """
+    Будит long-poll запросы уведомлений API-процесса по NOTIFY из транзакций
+    движка (в том числе из отдельного воркера). Пока подписки нет, запросы
+    перепроверяют БД каждые RECHECK_INTERVAL.
+    """
+
+    def __init__(self):
+        super().__init__(NOTIFICATIONS_CHANNEL, on_connect=self._on_connect)
+        self._changed = asyncio.Event()
+
+    def changed(self) -> asyncio.Event:
+        """Событие, которое сработает при следующем новом уведомлении."""
+        return self._changed
+
+    def handle(self, payload: str) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def _on_connect(self) -> None:
+        # Уведомления могли прийти, пока подписки не было
+        self.handle("")
+
+    async def poll(self, limit: int, timeout: float) -> List:
+        """
+        Ждет до timeout секунд, пока не появится хотя бы одно уведомление.
+        Соединение с БД занимается только на время проверки, не на ожидание.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            # Событие берется до проверки, чтобы не пропустить NOTIFY между ними
+            changed = self.changed()
+            async with async_session() as session:
+                items = await fetch_notifications(session, limit)
+            remaining = deadline - time.monotonic()
+            if items or remaining <= 0:
+                return items
+            try:
+                await asyncio.wait_for(
+                    changed.wait(),
+                    min(remaining, settings.NOTIFICATIONS.RECHECK_INTERVAL),
+                )
+            except asyncio.TimeoutError:
+                pass
+
+
+notification_hub = NotificationHub()
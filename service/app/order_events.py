@@ -0,0 +1,142 @@
+import abc
+import asyncio
+import json
+import logging
+from typing import Awaitable, Callable, Optional
+
+import asyncpg
+from sqlalchemy import Text, bindparam, func
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from service.app.database import engine
+from service.app.trigger_book import BookOrder, TriggerBook
+
+logger = logging.getLogger(__name__)
+
+ORDER_EVENTS_CHANNEL = "order_events"
+
+
+UPSERT = "upsert"
+DELETE = "delete"
+
+
+def order_event(action: str, order) -> str:
+    if action == DELETE:
+        payload = {"action": action, "id": order.id}
+    else:
+        payload = {"action": action, "order": BookOrder.from_order(order)._asdict()}
+    return json.dumps(payload)
+
+
+async def publish_order_event(db: AsyncSession, action: str, order) -> None:
+    """
+    Публикует изменение ордера через Postgres NOTIFY в транзакции db.
+    Подписчики получат событие только после commit, вместе с самим изменением.
+    """
+    await db.execute(
+        select(func.pg_notify(ORDER_EVENTS_CHANNEL, order_event(action, order)))
+    )
+
+
+async def publish_order_events(db: AsyncSession, action: str, orders) -> None:
+    """То же для нескольких ордеров одним запросом (pg_notify по unnest)."""
+    payloads = [order_event(action, order) for order in orders]
+    if not payloads:
+        return
+    events = func.unnest(
+        bindparam("payloads", payloads, type_=ARRAY(Text))
+    ).table_valued("payload")
+    await db.execute(select(func.pg_notify(ORDER_EVENTS_CHANNEL, events.c.payload)))
+
+
+def apply_order_event(book: TriggerBook, payload: str) -> None:
+    event = json.loads(payload)
+    if event["action"] == DELETE:
+        book.remove(event["id"])
+    else:
+        book.upsert(BookOrder(**event["order"]))
+
+
+class ChannelListener(abc.ABC):
+    """
+    Подписка на канал Postgres LISTEN/NOTIFY по выделенному соединению asyncpg.
+
+    Каждое событие передается в handle, который реализуют подклассы. После каждого (пере)подключения
+    вызывается on_connect, так как события, пришедшие пока соединения не было,
+    потеряны.
+    """
+
+    def __init__(
+        self,
+        channel: str,
+        on_connect: Callable[[], Awaitable[None]],
+        reconnect_delay: float = 5.0,
+    ):
+        self.channel = channel
+        self.on_connect = on_connect
+        self.reconnect_delay = reconnect_delay
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    @abc.abstractmethod
+    def handle(self, payload: str) -> None:
+        """Обрабатывает событие канала; вызывается в event loop без ожидания."""
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        try:
+            self.handle(payload)
+        except Exception as e:
+            logger.error(f"Некорректное событие канала {channel} {payload!r}: {e}")
+
+    async def _run(self) -> None:
+        dsn = engine.url.set(drivername="postgresql").render_as_string(
+            hide_password=False
+        )
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(dsn)
+                closed = asyncio.Event()
+                connection.add_termination_listener(lambda _: closed.set())
+                await connection.add_listener(self.channel, self._on_notify)
+                logger.info(f"Подписка на канал {self.channel} установлена")
+                await self.on_connect()
+                await closed.wait()
+                logger.warning(f"Соединение подписки {self.channel} потеряно")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка подписки на канал {self.channel}: {e}")
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(self.reconnect_delay)
+
+
+class OrderEventListener(ChannelListener):
+    """
+    Подписка движка на события ордеров: каждое событие сразу применяется к
+    индексу срабатывания, после (пере)подключения индекс полностью
+    перезагружается через on_connect.
+    """
+
+    def __init__(
+        self,
+        book: TriggerBook,
+        on_connect: Callable[[], Awaitable[None]],
+        reconnect_delay: float = 5.0,
+    ):
+        super().__init__(ORDER_EVENTS_CHANNEL, on_connect, reconnect_delay)
+        self.book = book
+
+    def handle(self, payload: str) -> None:
+        apply_order_event(self.book, payload)
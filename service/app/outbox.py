@@ -0,0 +1,234 @@
+import logging
+import time
+from typing import List, Set
+
+from sqlalchemy import and_, delete, func, or_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from service.app.config import settings
+from service.app.database import async_session
+from service.app.leases import WORKER_ID
+from service.app.metrics import metrics
+from service.app.models import Order, SwapIntent, Wallet
+from service.app.notifications import record_status_changes
+from service.app.order_events import DELETE, UPSERT, publish_order_events
+from service.app.schemas import OrderStatus
+from service.app.seqno import SeqnoManager
+from service.app.ton_wallet import MyTonClient, SignedTransfer
+
+logger = logging.getLogger(__name__)
+
+# Ключ advisory lock: сверку outbox выполняет только один процесс одновременно
+OUTBOX_LOCK_ID = 7_340_002
+
+# Просроченные сообщения, транзакция которых не найдена на прошлой сверке
+_missing: Set[str] = set()
+
+
+async def write_intent(
+    session: AsyncSession, wallet_id: int, transfer: SignedTransfer, orders: List
+) -> None:
+    """
+    Сохраняет подписанное сообщение в outbox и переводит его ордера в EXECUTING
+    одной транзакцией. Вызывается до отправки: после сбоя в любой момент
+    дальше ордер не будет исполнен повторно, пока сообщение может попасть в цепь.
+    Если хотя бы один ордер уже не CREATED, изменен после проверки срабатывания
+    или аренда перешла к другому воркеру, транзакция откатывается и сообщение
+    не отправляется.
+    """
+    order_ids = [order.id for order in orders]
+    # Ордер исполняется с теми параметрами, по которым проверено срабатывание
+    unchanged = or_(
+        *(
+            and_(
+                Order.id == order.id,
+                Order.price == order.price,
+                Order.volume == order.volume,
+                Order.jetton_address == order.jetton_address,
+            )
+            for order in orders
+        )
+    )
+    session.add(
+        SwapIntent(
+            message_hash=transfer.message_hash,
+            wallet_id=wallet_id,
+            seqno=transfer.seqno,
+            valid_until=transfer.valid_until,
+            boc=transfer.boc,
+        )
+    )
+    result = await session.execute(
+        update(Order)
+        .where(
+            Order.id.in_(order_ids),
+            Order.status == OrderStatus.CREATED.value,
+            Order.lease_owner == WORKER_ID,
+            unchanged,
+        )
+        .values(
+            status=OrderStatus.EXECUTING.value,
+            tx_hash=transfer.message_hash,
+            lease_owner=None,
+            lease_expires_at=None,
+        )
+        .returning(Order.id)
+        .execution_options(synchronize_session=False)
+    )
+    if len(result.scalars().all()) != len(order_ids):
+        await session.rollback()
+        raise RuntimeError(
+            f"Ордера {order_ids} изменены или их аренда потеряна, своп не отправлен"
+        )
+    # Пока сообщение может попасть в цепь, кошелек не достанется другому
+    # воркеру: тот взял бы seqno из цепи и подписал бы им другое сообщение
+    await session.execute(
+        update(Wallet)
+        .where(Wallet.id == wallet_id, Wallet.lease_owner == WORKER_ID)
+        .values(
+            lease_expires_at=func.greatest(
+                Wallet.lease_expires_at,
+                func.to_timestamp(
+                    transfer.valid_until + settings.SCHEDULER.OUTBOX_GRACE
+                ),
+            )
+        )
+        .execution_options(synchronize_session=False)
+    )
+    # Остальные воркеры убирают ордера из своих индексов
+    await publish_order_events(session, DELETE, orders)
+    await session.commit()
+
+
+async def _confirm(session: AsyncSession, intent: SwapIntent) -> None:
+    """
+    Транзакция сообщения найдена: ордера переходят из EXECUTING в PENDING.
+    Запись outbox остается до итогового статуса - ее удаляет мониторинг
+    транзакций.
+    """
+    result = await session.execute(
+        update(Order)
+        .where(
+            Order.tx_hash == intent.message_hash,
+            Order.status == OrderStatus.EXECUTING.value,
+        )
+        .values(status=OrderStatus.PENDING.value)
+        .returning(Order.id)
+        .execution_options(synchronize_session=False)
+    )
+    await record_status_changes(session, result.scalars().all())
+
+
+async def _revert(session: AsyncSession, intent: SwapIntent) -> None:
+    """
+    Сообщение не попало в цепь: ордера (EXECUTING или уже PENDING) возвращаются
+    в CREATED, запись outbox удаляется.
+    """
+    reverted = {}
+    for status in (OrderStatus.EXECUTING.value, OrderStatus.PENDING.value):
+        result = await session.execute(
+            update(Order)
+            .where(Order.tx_hash == intent.message_hash, Order.status == status)
+            .values(status=OrderStatus.CREATED.value, tx_hash=None)
+            .returning(Order)
+            .execution_options(synchronize_session=False)
+        )
+        reverted[status] = result.scalars().all()
+    # Ордера возвращаются в индексы срабатывания
+    await publish_order_events(
+        session,
+        UPSERT,
+        reverted[OrderStatus.EXECUTING.value] + reverted[OrderStatus.PENDING.value],
+    )
+    # О неудачной отправке из EXECUTING пользователь не уведомляется - для него
+    # ордер так и не исполнялся; о PENDING он уже знает, и откат ему сообщается
+    await record_status_changes(
+        session, [order.id for order in reverted[OrderStatus.PENDING.value]]
+    )
+    await session.execute(delete(SwapIntent).where(SwapIntent.id == intent.id))
+
+
+async def recover_intents(ton_client: MyTonClient) -> None:
+    """
+    Сверяет незавершенные отправки из outbox с цепью (при старте и периодически).
+
+    - транзакция сообщения найдена: ордера переходят в PENDING, дальше их ведет
+      мониторинг транзакций;
+    - сообщение уже не может попасть в цепь (истек valid_until + OUTBOX_GRACE,
+      а для seqno 0 - seqno занят) и транзакции нет ни на этой, ни на прошлой
+      сверке: ордера возвращаются в CREATED. Индексатор может отставать от цепи,
+      поэтому одного промаха поиска для отката мало;
+    - seqno кошелька уже занят, а транзакция не найдена: ждем - это может быть
+      само сообщение, которое индексатор еще не видит;
+    - иначе сообщение отправляется повторно: это то же сообщение с тем же хэшем,
+      поэтому исполниться оно может только один раз.
+
+    Запись outbox живет до итогового статуса транзакции (ее удаляет мониторинг
+    транзакций), поэтому сверяются и сообщения, об отправке которых уже записан
+    PENDING: потерянное сообщение отправляется повторно и не блокирует
+    следующие seqno кошелька, а просроченное возвращает ордера в CREATED.
+
+    seqno читается из цепи до поиска транзакции: если сообщение попадет в цепь
+    между этими запросами, поиск его уже найдет, и занятый seqno не будет принят
+    за чужое сообщение.
+    """
+    async with async_session() as session:
+        locked = await session.scalar(
+            select(func.pg_try_advisory_xact_lock(OUTBOX_LOCK_ID))
+        )
+        if not locked:
+            return
+        result = await session.execute(
+            select(
+                SwapIntent,
+                Wallet.address,
+                func.extract("epoch", func.now() - SwapIntent.created_at),
+            )
+            .join(Wallet, Wallet.id == SwapIntent.wallet_id)
+            .order_by(SwapIntent.id)
+        )
+        intents = result.all()
+        metrics.set("outbox_intents", len(intents))
+        grace = settings.SCHEDULER.OUTBOX_GRACE
+        missing = set()
+        for intent, address, age in intents:
+            try:
+                expired = intent.seqno > 0 and time.time() > intent.valid_until + grace
+                chain_seqno = await SeqnoManager.chain_seqno(ton_client.client, address)
+                transaction = await ton_client.get_message_transaction(
+                    intent.message_hash
+                )
+                if transaction is not None:
+                    async with session.begin_nested():
+                        await _confirm(session, intent)
+                    ton_client.seqnos.confirm(address, intent.seqno)
+                    metrics.inc("outbox_confirmed")
+                    continue
+
+                consumed = chain_seqno > intent.seqno
+                # Сообщение с seqno 0 (развертывание кошелька) не ограничено по
+                # времени: оно не попадет в цепь, только если seqno 0 уже занят
+                if expired or (intent.seqno == 0 and consumed and age > grace):
+                    if intent.message_hash not in _missing:
+                        missing.add(intent.message_hash)
+                        continue
+                    logger.warning(
+                        f"Сообщение {intent.message_hash} не попало в цепь, "
+                        f"ордера возвращены в CREATED"
+                    )
+                    async with session.begin_nested():
+                        await _revert(session, intent)
+                    metrics.inc("outbox_reverted")
+                    continue
+                if consumed:
+                    metrics.inc("outbox_awaiting_index")
+                    continue
+
+                await ton_client.client.send_message(intent.boc)
+                metrics.inc("outbox_rebroadcasts")
+            except Exception as e:
+                logger.error(f"Ошибка сверки сообщения {intent.message_hash}: {e}")
+        await session.commit()
+        _missing.clear()
+        _missing.update(missing)
@@ -0,0 +1,137 @@
+import heapq
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from service.app.config import settings
+from service.app.metrics import metrics
+from service.app.quotes import QuoteKey
+
+
+class KeyState(NamedTuple):
+    price: float
+    observed_at: float
+    threshold: Optional[float]
+
+
+class PollSchedule:
+    """
+    Расписание проверок ключей котировок (jetton_address, order_type, volume).
+
+    Время следующей проверки ключа - оценка того, когда цена может дойти до
+    ближайшего несработавшего ордера. Цена считается случайным блужданием с
+    дисперсией жетона (EWMA квадрата относительного изменения цены в секунду):
+    уровень на расстоянии d достижим за (d / (POLL_SAFETY * sigma))^2 секунд.
+    Дисперсия не опускается ниже POLL_MIN_VOLATILITY: у цены, которая пока не
+    менялась, задержка все равно растет с расстоянием до уровня, а не сразу
+    становится максимальной.
+    Задержка ограничивается [POLL_MIN_INTERVAL, POLL_MAX_INTERVAL]. Ключи лежат в куче
+    по времени проверки, устаревшие записи кучи пропускаются при извлечении.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, QuoteKey]] = []
+        self._due_at: Dict[QuoteKey, float] = {}
+        self._state: Dict[QuoteKey, KeyState] = {}
+        # Ключи, которые после последней котировки проверяются на каждом тике
+        self._urgent: Set[QuoteKey] = set()
+        # jetton_address -> дисперсия относительного изменения цены в секунду
+        self._volatility: Dict[str, float] = {}
+
+    def _push(self, key: QuoteKey, due_at: float) -> None:
+        self._due_at[key] = due_at
+        heapq.heappush(self._heap, (due_at, key))
+
+    def reset(self, key: QuoteKey) -> None:
+        """Проверить ключ на ближайшем тике."""
+        self._push(key, 0.0)
+
+    def level_changed(
+        self,
+        key: QuoteKey,
+        min_price: float,
+        nearest_level: Callable[[QuoteKey, float], Optional[float]],
+    ) -> None:
+        """
+        В ключ добавлены ордера с минимальной ценой min_price. Ключ проверяется
+        сразу, если ордер уже достигнут последней котировкой ключа (ближайший
+        несработавший уровень при этом не меняется) или если ближайший уровень
+        сдвинулся.
+        """
+        state = self._state.get(key)
+        if state is None:
+            return
+        if (
+            min_price <= state.price
+            or nearest_level(key, state.price) != state.threshold
+        ):
+            self.reset(key)
+
+    def due(self, keys: Iterable[QuoteKey], now: float) -> List[QuoteKey]:
+        """Ключи из keys, которые пора проверить; новые ключи проверяются сразу."""
+        keys = set(keys)
+        for key in list(self._due_at):
+            if key not in keys:
+                del self._due_at[key]
+                self._state.pop(key, None)
+                self._urgent.discard(key)
+
+        due = [key for key in keys if key not in self._due_at]
+        while self._heap and self._heap[0][0] <= now:
+            due_at, key = heapq.heappop(self._heap)
+            if self._due_at.get(key) == due_at:
+                del self._due_at[key]
+                due.append(key)
+        if len(self._heap) > 2 * len(self._due_at) + 64:
+            # Чистим кучу от устаревших записей
+            self._heap = [(t, k) for k, t in self._due_at.items()]
+            heapq.heapify(self._heap)
+
+        metrics.set("poll_keys_total", len(keys))
+        metrics.set("poll_keys_due", len(due))
+        return due
+
+    def is_urgent(self, key: QuoteKey) -> bool:
+        """Ключ близок к срабатыванию - его котировка идет вне очереди."""
+        return key in self._urgent
+
+    def observe(
+        self, key: QuoteKey, price: float, threshold: Optional[float], now: float
+    ) -> None:
+        """
+        Учитывает котировку ключа и планирует его следующую проверку.
+        threshold - ближайшая цена ордера, еще не достигнутая котировкой.
+        """
+        scheduler = settings.SCHEDULER
+        jetton_address = key[0]
+        previous = self._state.get(key)
+        if previous is not None and previous.price and now > previous.observed_at:
+            # Цена - случайное блуждание: дисперсия изменения растет линейно по времени
+            change = (price - previous.price) / previous.price
+            variance = change**2 / (now - previous.observed_at)
+            current = self._volatility.get(jetton_address)
+            self._volatility[jetton_address] = (
+                variance
+                if current is None
+                else scheduler.POLL_VOLATILITY_ALPHA * variance
+                + (1 - scheduler.POLL_VOLATILITY_ALPHA) * current
+            )
+        self._state[key] = KeyState(price, now, threshold)
+
+        volatility = self._volatility.get(jetton_address)
+        if threshold is None:
+            delay = scheduler.POLL_MAX_INTERVAL
+        elif volatility is None or price <= 0:
+            # Волатильность еще неизвестна - проверяем на каждом тике
+            delay = scheduler.POLL_MIN_INTERVAL
+        else:
+            # Время, за которое цена с запасом POLL_SAFETY сигм дойдет до уровня
+            volatility = max(volatility, scheduler.POLL_MIN_VOLATILITY)
+            distance = (threshold - price) / price
+            delay = distance**2 / (scheduler.POLL_SAFETY**2 * volatility)
+        delay = min(
+            max(delay, scheduler.POLL_MIN_INTERVAL), scheduler.POLL_MAX_INTERVAL
+        )
+        if delay <= scheduler.POLL_MIN_INTERVAL and threshold is not None:
+            self._urgent.add(key)
+        else:
+            self._urgent.discard(key)
+        self._push(key, now + delay)
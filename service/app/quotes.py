@@ -0,0 +1,297 @@
+import asyncio
+import math
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Collection, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from service.app.config import settings
+from service.app.metrics import metrics
+from service.app.rate_limit import ROUTINE, URGENT, priority
+from service.app.ton_wallet import MyTonClient
+
+QuoteKey = Tuple[str, str, float]
+MarketKey = Tuple[str, str]
+
+
+class QuoteCoalescer:
+    """
+    Объединяет запросы котировок ston.fi (/v1/swap/simulate).
+
+    В пределах одного тика на каждый уникальный ключ (jetton_address, order_type, volume)
+    выполняется ровно один запрос, результат (или ошибка) раздается всем ордерам группы.
+    Параллельные запросы одного и того же ключа ждут уже запущенный запрос (single-flight).
+    """
+
+    def __init__(self, client: MyTonClient):
+        self.client = client
+        self._quotes: Dict[QuoteKey, asyncio.Task] = {}
+
+    def new_tick(self) -> None:
+        """Сбрасывает котировки прошлого тика, незавершенные запросы остаются общими."""
+        self._quotes = {
+            key: task for key, task in self._quotes.items() if not task.done()
+        }
+
+    async def get_price(
+        self, jetton_address: str, order_type: str, amount: float
+    ) -> float:
+        key = (jetton_address, order_type, amount)
+        task = self._quotes.get(key)
+        if task is None:
+            task = asyncio.ensure_future(
+                self.client.get_current_price(jetton_address, order_type, amount)
+            )
+            self._quotes[key] = task
+            metrics.inc("quote_requests")
+        # shield: отмена одного ожидающего не должна отменять запрос для остальных
+        return await asyncio.shield(task)
+
+    async def _get_price(self, key: QuoteKey, level: int) -> float:
+        with priority(level):
+            return await self.get_price(*key)
+
+    async def get_prices(
+        self, keys, urgent: Collection[QuoteKey] = ()
+    ) -> Dict[QuoteKey, object]:
+        """
+        Запрашивает котировки для набора ключей параллельно.
+        Ключи из urgent запрашиваются вне очереди планового опроса.
+        Возвращает словарь ключ -> цена либо исключение, полученное для этого ключа.
+        """
+        keys = list(keys)
+        results = await asyncio.gather(
+            *(
+                self._get_price(key, URGENT if key in urgent else ROUTINE)
+                for key in keys
+            ),
+            return_exceptions=True,
+        )
+        return dict(zip(keys, results))
+
+
+def sample_volumes(low: float, high: float, points: int) -> List[float]:
+    """Объемы для построения кривой: геометрическая сетка от low до high."""
+    if points < 2 or low >= high:
+        return sorted({low, high})
+    ratio = (high / low) ** (1 / (points - 1))
+    volumes = [low * ratio**i for i in range(1, points - 1)]
+    return [low, *volumes, high]
+
+
+class QuoteCurve:
+    """
+    Кривая цены от объема (price impact) для одного рынка.
+
+    Цена из /v1/swap/simulate монотонна по объему, поэтому между соседними
+    точками она лежит в отрезке [p_i, p_i+1]. Интерполяция возвращает значение,
+    только если соседние точки расходятся не больше чем на max_error -
+    тогда и ошибка интерполяции не больше max_error.
+    """
+
+    def __init__(
+        self,
+        volumes: Sequence[float],
+        prices: Sequence[float],
+        expires_at: float,
+        max_error: float,
+    ):
+        self.volumes = list(volumes)
+        self.prices = list(prices)
+        self.expires_at = expires_at
+        self.max_error = max_error
+
+    def covers(self, low: float, high: float) -> bool:
+        return self.volumes[0] <= low and high <= self.volumes[-1]
+
+    def drifted(self, price: float) -> bool:
+        """
+        Котировка опорного (максимального) объема ушла от кривой - изменились
+        резервы пула. На максимальном объеме price impact виден сильнее всего.
+        """
+        return abs(price - self.prices[-1]) > self.max_error * abs(self.prices[-1])
+
+    def price_at(self, volume: float) -> Optional[float]:
+        """Цена для объема volume или None, если точность не гарантирована."""
+        i = bisect_left(self.volumes, volume)
+        if i < len(self.volumes) and self.volumes[i] == volume:
+            return self.prices[i]
+        if i == 0 or i == len(self.volumes):
+            return None
+        v0, v1 = self.volumes[i - 1], self.volumes[i]
+        p0, p1 = self.prices[i - 1], self.prices[i]
+        if abs(p1 - p0) > self.max_error * min(abs(p0), abs(p1)):
+            return None
+        weight = math.log(volume / v0) / math.log(v1 / v0)
+        return p0 + (p1 - p0) * weight
+
+
+class QuoteCurveCache:
+    """
+    Котировки по кривым рынков (jetton_address, order_type).
+
+    На обновление кривой запрашивается QUOTE_CURVE_POINTS объемов, покрывающих
+    объемы всех ордеров рынка, и сетка сгущается (до QUOTE_CURVE_MAX_POINTS) там,
+    где соседние точки расходятся больше допуска; цены остальных объемов
+    интерполируются. Пока кривая
+    жива (QUOTE_CURVE_TTL), на тик приходится один запрос - котировка опорного
+    (максимального) объема: если она сдвинулась больше чем на QUOTE_CURVE_MAX_ERROR,
+    резервы пула изменились и кривая строится заново. Объемы, для которых
+    интерполяция не дает нужной точности, запрашиваются точно.
+
+    Диапазон кривой и набор хранимых кривых определяются всеми живыми ключами
+    (live_keys), а не только теми, что котируются в этом тике: при адаптивном
+    опросе набор котируемых ключей меняется от тика к тику, и кривая по нему
+    перестраивалась бы каждый раз.
+    """
+
+    def __init__(self, quotes: QuoteCoalescer):
+        self.quotes = quotes
+        self._curves: Dict[MarketKey, QuoteCurve] = {}
+
+    async def _build_curve(
+        self, market: MarketKey, low: float, high: float
+    ) -> QuoteCurve:
+        max_error = settings.SCHEDULER.QUOTE_CURVE_MAX_ERROR
+        volumes = sample_volumes(low, high, settings.SCHEDULER.QUOTE_CURVE_POINTS)
+        prices = await asyncio.gather(
+            *(self.quotes.get_price(*market, volume) for volume in volumes)
+        )
+        points = dict(zip(volumes, prices))
+        # Сгущаем сетку там, где соседние точки расходятся больше допуска
+        while len(points) < settings.SCHEDULER.QUOTE_CURVE_MAX_POINTS:
+            volumes = sorted(points)
+            budget = settings.SCHEDULER.QUOTE_CURVE_MAX_POINTS - len(points)
+            midpoints = [
+                math.sqrt(v0 * v1)
+                for v0, v1 in zip(volumes, volumes[1:])
+                if abs(points[v1] - points[v0])
+                > max_error * min(abs(points[v0]), abs(points[v1]))
+            ][:budget]
+            if not midpoints:
+                break
+            prices = await asyncio.gather(
+                *(self.quotes.get_price(*market, volume) for volume in midpoints)
+            )
+            points.update(zip(midpoints, prices))
+        metrics.inc("quote_curve_refreshes")
+        volumes = sorted(points)
+        return QuoteCurve(
+            volumes,
+            [points[volume] for volume in volumes],
+            expires_at=time.monotonic() + settings.SCHEDULER.QUOTE_CURVE_TTL,
+            max_error=max_error,
+        )
+
+    async def _get_curve(
+        self, market: MarketKey, low: float, high: float
+    ) -> QuoteCurve:
+        curve = self._curves.get(market)
+        if (
+            curve is not None
+            and curve.expires_at > time.monotonic()
+            and curve.covers(low, high)
+        ):
+            probe = await self.quotes.get_price(*market, curve.volumes[-1])
+            if not curve.drifted(probe):
+                return curve
+        curve = await self._build_curve(market, low, high)
+        self._curves[market] = curve
+        return curve
+
+    async def _market_prices(
+        self,
+        market: MarketKey,
+        volumes: List[float],
+        volume_range: Tuple[float, float],
+        level: int,
+    ) -> Dict[float, float]:
+        with priority(level):
+            return await self._quote_market(market, volumes, volume_range)
+
+    async def _quote_market(
+        self,
+        market: MarketKey,
+        volumes: List[float],
+        volume_range: Tuple[float, float],
+    ) -> Dict[float, float]:
+        curve = await self._get_curve(market, *volume_range)
+        prices = {}
+        exact = []
+        for volume in volumes:
+            price = curve.price_at(volume)
+            if price is None:
+                exact.append(volume)
+            else:
+                prices[volume] = price
+        metrics.inc("quote_curve_hits", len(prices))
+        if exact:
+            metrics.inc("quote_curve_misses", len(exact))
+            results = await asyncio.gather(
+                *(self.quotes.get_price(*market, volume) for volume in exact),
+                return_exceptions=True,
+            )
+            prices.update(zip(exact, results))
+        return prices
+
+    async def get_prices(
+        self,
+        keys,
+        urgent: Collection[QuoteKey] = (),
+        live_keys: Optional[Iterable[QuoteKey]] = None,
+    ) -> Dict[QuoteKey, object]:
+        """
+        Тот же контракт, что и у QuoteCoalescer.get_prices. Рынок с хотя бы
+        одним срочным ключом котируется вне очереди целиком. Ключи с
+        неположительным объемом котируются точно, без кривой: ошибка такого
+        ключа не должна ломать кривую всего рынка. live_keys - все ключи
+        индекса (по умолчанию keys): по ним строятся диапазоны кривых и
+        выбираются кривые, которые стоит хранить.
+        """
+        keys = list(keys)
+        ranges: Dict[MarketKey, Tuple[float, float]] = {}
+        for jetton_address, order_type, volume in (
+            keys if live_keys is None else [*live_keys, *keys]
+        ):
+            if volume > 0:
+                market = (jetton_address, order_type)
+                low, high = ranges.get(market, (volume, volume))
+                ranges[market] = (min(low, volume), max(high, volume))
+        # Кривые рынков, по которым не осталось ордеров, больше не нужны
+        self._curves = {
+            market: curve for market, curve in self._curves.items() if market in ranges
+        }
+
+        by_market: Dict[MarketKey, List[float]] = defaultdict(list)
+        urgent_markets = set()
+        invalid = []
+        for key in keys:
+            jetton_address, order_type, volume = key
+            if not volume > 0:
+                invalid.append(key)
+                continue
+            by_market[(jetton_address, order_type)].append(volume)
+            if key in urgent:
+                urgent_markets.add((jetton_address, order_type))
+
+        markets = list(by_market)
+        results, prices = await asyncio.gather(
+            asyncio.gather(
+                *(
+                    self._market_prices(
+                        market,
+                        by_market[market],
+                        ranges[market],
+                        URGENT if market in urgent_markets else ROUTINE,
+                    )
+                    for market in markets
+                ),
+                return_exceptions=True,
+            ),
+            self.quotes.get_prices(invalid, urgent=urgent),
+        )
+        for market, result in zip(markets, results):
+            for volume in by_market[market]:
+                price = result if isinstance(result, Exception) else result[volume]
+                prices[(*market, volume)] = price
+        return prices
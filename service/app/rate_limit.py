@@ -0,0 +1,125 @@
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+
+from service.app.metrics import metrics
+
+# Приоритеты запросов к внешним API: меньше - раньше
+SWAP = 0
+URGENT = 1
+ROUTINE = 2
+
+request_priority: ContextVar[int] = ContextVar("request_priority", default=ROUTINE)
+
+
+@contextmanager
+def priority(level: int):
+    """Задает приоритет всех запросов к внешним API внутри блока (и порожденных задач)."""
+    token = request_priority.set(level)
+    try:
+        yield
+    finally:
+        request_priority.reset(token)
+
+
+def queue_timeout(deadline: float) -> Optional[float]:
+    """
+    Сколько запрос текущего приоритета может ждать токен: плановый опрос -
+    не дольше дедлайна запроса (иначе котировка устареет еще в очереди),
+    свопы и срочные котировки ждут без ограничения.
+    """
+    return deadline if request_priority.get() >= ROUTINE else None
+
+
+class UpstreamRateLimited(Exception):
+    """Внешний API ответил 429 Too Many Requests."""
+
+
+class QueueTimeout(Exception):
+    """Запрос не дождался токена за отведенное время и отброшен, не дойдя до API."""
+
+
+class RateLimiter:
+    """
+    Token bucket на один внешний API с очередью по приоритету.
+
+    Токены пополняются со скоростью rate в секунду, но не больше burst. Когда
+    токенов нет, запросы ждут в куче (приоритет, порядок поступления): свопы
+    идут раньше котировок близких к срабатыванию ордеров, а те - раньше
+    планового опроса. После ответа 429 выдача токенов приостанавливается.
+    """
+
+    def __init__(self, name: str, rate: float, burst: int):
+        self.name = name
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._order = itertools.count()
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _dispatch(self) -> None:
+        self._wakeup = None
+        now = time.monotonic()
+        self._refill(now)
+        while self._waiters and now >= self._paused_until:
+            _, _, waiter = self._waiters[0]
+            if waiter.done():
+                # Ожидающий отменен
+                heapq.heappop(self._waiters)
+                continue
+            if self._tokens < 1:
+                break
+            heapq.heappop(self._waiters)
+            self._tokens -= 1
+            waiter.set_result(None)
+
+        if self._waiters:
+            delay = max(self._paused_until - now, (1 - self._tokens) / self.rate, 0)
+            self._wakeup = asyncio.get_running_loop().call_later(delay, self._dispatch)
+        metrics.set(f"rate_limit_{self.name}_queue_depth", len(self._waiters))
+
+    async def acquire(
+        self, level: Optional[int] = None, timeout: Optional[float] = None
+    ) -> None:
+        """
+        Ждет токен; по умолчанию с приоритетом текущего контекста. Если токен
+        не получен за timeout секунд, запрос снимается с очереди (QueueTimeout).
+        """
+        if self.rate <= 0:
+            return
+        if level is None:
+            level = request_priority.get()
+        started = time.monotonic()
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (level, next(self._order), waiter))
+        if self._wakeup is None:
+            self._dispatch()
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            # Отмененный waiter уберет из кучи _dispatch
+            metrics.inc(f"rate_limit_{self.name}_shed")
+            raise QueueTimeout(
+                f"{self.name}: токен не получен за {timeout} с"
+            ) from None
+        metrics.inc(f"rate_limit_{self.name}_acquired")
+        metrics.inc(f"rate_limit_{self.name}_wait_seconds", time.monotonic() - started)
+
+    def pause(self, seconds: float) -> None:
+        """Останавливает выдачу токенов на seconds (ответ 429 / Retry-After)."""
+        now = time.monotonic()
+        self._paused_until = max(self._paused_until, now + seconds)
+        self._tokens = 0.0
+        self._updated = now
+        metrics.inc(f"rate_limit_{self.name}_throttled")
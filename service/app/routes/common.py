@@ -0,0 +1,63 @@
+from fastapi import HTTPException
+from sqlalchemy import and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from service.app.models import Order, User, Wallet
+
+
+async def get_user_and_wallet(db: AsyncSession, telegram_user_id: str):
+    """
+    Пользователь и его кошелек одним запросом (users LEFT JOIN wallets).
+    Возвращает (user, wallet); любой из них может быть None.
+    """
+    result = await db.execute(
+        select(User, Wallet)
+        .outerjoin(Wallet, Wallet.user_id == User.id)
+        .where(User.telegram_user_id == telegram_user_id)
+        .order_by(Wallet.id)
+        .limit(1)
+    )
+    row = result.first()
+    if row is None:
+        return None, None
+    return row.User, row.Wallet
+
+
+async def resolve_wallet(db: AsyncSession, telegram_user_id: str) -> Wallet:
+    """Кошелек пользователя за один запрос к БД, иначе 404."""
+    user, wallet = await get_user_and_wallet(db, telegram_user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="The user was not found")
+    if not wallet:
+        raise HTTPException(status_code=404, detail="Wallet not found")
+    return wallet
+
+
+async def resolve_order(
+    db: AsyncSession, telegram_user_id: str, order_id: str
+) -> Order:
+    """
+    Ордер пользователя за один запрос к БД (users LEFT JOIN wallets LEFT JOIN orders).
+    Внешние join'ы позволяют отличить отсутствующего пользователя, кошелек и ордер.
+    """
+    result = await db.execute(
+        select(User.id, Wallet.id, Order)
+        .select_from(User)
+        .outerjoin(Wallet, Wallet.user_id == User.id)
+        .outerjoin(
+            Order, and_(Order.wallet_id == Wallet.id, Order.order_id == order_id)
+        )
+        .where(User.telegram_user_id == telegram_user_id)
+        .order_by(Wallet.id)
+        .limit(1)
+    )
+    row = result.first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="The user was not found")
+    user_id, wallet_id, order = row
+    if wallet_id is None:
+        raise HTTPException(status_code=404, detail="Wallet not found")
+    if order is None:
+        raise HTTPException(status_code=404, detail="The order was not found")
+    return order
@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+
+from service.app.metrics import metrics
+
+router = APIRouter()
+
+
+@router.get("/metrics")
+async def get_metrics():
+    return metrics.snapshot()
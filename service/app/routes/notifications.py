@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from service.app.config import settings
+from service.app.database import get_db
+from service.app.notifications import ack_notifications, notification_hub
+from service.app.schemas import NotificationAck, NotificationPage
+
+router = APIRouter()
+
+
+@router.get("/notifications", response_model=NotificationPage)
+async def poll_notifications(
+    limit: int = Query(100, ge=1, le=1000),
+    timeout: float = Query(0, ge=0, le=settings.NOTIFICATIONS.MAX_POLL_TIMEOUT),
+):
+    """
+    Long-poll: неподтвержденные уведомления о смене статусов ордеров, по
+    возрастанию id. Если их нет, ответ ждет новых до timeout секунд.
+    """
+    return {"items": await notification_hub.poll(limit, timeout)}
+
+
+@router.post("/notifications/ack")
+async def ack(ack_data: NotificationAck, db: AsyncSession = Depends(get_db)):
+    await ack_notifications(db, ack_data.ids)
+    return {"detail": "The notifications have been acknowledged"}
@@ -1,34 +1,36 @@
+import base64
 import datetime
 import uuid
-from typing import List
+from typing import Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import delete, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
 from service.app.database import get_db
-from service.app.models import Order, User, Wallet
-from service.app.schemas import OrderCreate, OrderResponse, OrderStatus, OrderUpdate
+from service.app.models import Order
+from service.app.order_events import DELETE, UPSERT, publish_order_event
+from service.app.routes.common import resolve_order, resolve_wallet
+from service.app.schemas import (
+    OrderCreate,
+    OrderPage,
+    OrderResponse,
+    OrderStatus,
+    OrderType,
+    OrderUpdate,
+)
 
 router = APIRouter()
 
+ORDER_EXECUTING = "The order is already being executed"
+
 
 @router.post("/orders/{telegram_user_id}", response_model=OrderResponse)
 async def create_order(
     telegram_user_id: str, order_data: OrderCreate, db: AsyncSession = Depends(get_db)
 ):
-
-    result = await db.execute(
-        select(User).where(User.telegram_user_id == telegram_user_id)
-    )
-    user = result.scalars().first()
-    if not user:
-        raise HTTPException(status_code=404, detail="The user was not found")
-
-    wallet_result = await db.execute(select(Wallet).where(Wallet.user_id == user.id))
-    wallet = wallet_result.scalars().first()
-    if not wallet:
-        raise HTTPException(status_code=404, detail="Wallet not found")
+    wallet = await resolve_wallet(db, telegram_user_id)
 
     new_order = Order(
         order_id=str(uuid.uuid4()),
@@ -41,81 +43,86 @@ async def create_order(
         timestamp=datetime.datetime.utcnow(),
     )
     db.add(new_order)
+    await db.flush()
+    await publish_order_event(db, UPSERT, new_order)
     await db.commit()
     await db.refresh(new_order)
     return new_order
 
 
-@router.get("/orders/{telegram_user_id}", response_model=List[OrderResponse])
-async def get_orders(telegram_user_id: str, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(
-        select(User).where(User.telegram_user_id == telegram_user_id)
-    )
-    user = result.scalars().first()
-    if not user:
-        raise HTTPException(status_code=404, detail="The user was not found")
+def _encode_cursor(order: Order) -> str:
+    raw = f"{order.timestamp.isoformat()}|{order.id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("utf-8")
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime.datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("utf-8")).decode("utf-8")
+        timestamp, order_id = raw.split("|")
+        return datetime.datetime.fromisoformat(timestamp), int(order_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
-    wallet_result = await db.execute(select(Wallet).where(Wallet.user_id == user.id))
-    wallet = wallet_result.scalars().first()
-    if not wallet:
-        raise HTTPException(status_code=404, detail="Wallet not found")
 
-    orders_result = await db.execute(select(Order).where(Order.wallet_id == wallet.id))
+@router.get("/orders/{telegram_user_id}", response_model=OrderPage)
+async def get_orders(
+    telegram_user_id: str,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    status: Optional[OrderStatus] = None,
+    order_type: Optional[OrderType] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    wallet = await resolve_wallet(db, telegram_user_id)
+
+    query = select(Order).where(Order.wallet_id == wallet.id)
+    if status is not None:
+        query = query.where(Order.status == status.value)
+    if order_type is not None:
+        query = query.where(Order.order_type == order_type.value)
+    if cursor is not None:
+        # Keyset: продолжаем строго после последней строки предыдущей страницы
+        query = query.where(
+            tuple_(Order.timestamp, Order.id) < tuple_(*_decode_cursor(cursor))
+        )
+    # Новые ордера первыми; индекс (wallet_id, timestamp, id) читается в обратном порядке
+    query = query.order_by(Order.timestamp.desc(), Order.id.desc()).limit(limit + 1)
+
+    orders_result = await db.execute(query)
     orders = orders_result.scalars().all()
-    return orders
+    has_more = len(orders) > limit
+    orders = orders[:limit]
+    return {
+        "items": orders,
+        "next_cursor": _encode_cursor(orders[-1]) if has_more else None,
+        "has_more": has_more,
+    }
 
 
 @router.get("/orders/{telegram_user_id}/{order_id}", response_model=OrderResponse)
 async def get_order(
     telegram_user_id: str, order_id: str, db: AsyncSession = Depends(get_db)
 ):
-    result = await db.execute(
-        select(User).where(User.telegram_user_id == telegram_user_id)
-    )
-    user = result.scalars().first()
-    if not user:
-        raise HTTPException(status_code=404, detail="The user was not found")
-
-    wallet_result = await db.execute(select(Wallet).where(Wallet.user_id == user.id))
-    wallet = wallet_result.scalars().first()
-    if not wallet:
-        raise HTTPException(status_code=404, detail="Wallet not found")
-
-    order_result = await db.execute(
-        select(Order).where(Order.order_id == order_id, Order.wallet_id == wallet.id)
-    )
-    order = order_result.scalars().first()
-    if not order:
-        raise HTTPException(status_code=404, detail="The order was not found")
-    return order
+    return await resolve_order(db, telegram_user_id, order_id)
 
 
 @router.delete("/orders/{telegram_user_id}/{order_id}")
 async def delete_order(
     telegram_user_id: str, order_id: str, db: AsyncSession = Depends(get_db)
 ):
-    result = await db.execute(
-        select(User).where(User.telegram_user_id == telegram_user_id)
-    )
-    user = result.scalars().first()
-    if not user:
-        raise HTTPException(status_code=404, detail="The user was not found")
-
-    wallet_result = await db.execute(select(Wallet).where(Wallet.user_id == user.id))
-    wallet = wallet_result.scalars().first()
-    if not wallet:
-        raise HTTPException(status_code=404, detail="Wallet not found")
-
-    order_result = await db.execute(
-        select(Order).where(Order.order_id == order_id, Order.wallet_id == wallet.id)
-    )
-    order = order_result.scalars().first()
-    if not order:
-        raise HTTPException(status_code=404, detail="The order was not found")
+    order = await resolve_order(db, telegram_user_id, order_id)
 
     if order.status != OrderStatus.CREATED.value:
         raise HTTPException(status_code=400, detail="The order cannot be deleted")
-    await db.delete(order)
+    # Ордер мог уйти на исполнение после чтения: удаляем, только пока он CREATED
+    result = await db.execute(
+        delete(Order).where(
+            Order.id == order.id, Order.status == OrderStatus.CREATED.value
+        )
+    )
+    if result.rowcount == 0:
+        raise HTTPException(status_code=409, detail=ORDER_EXECUTING)
+    await publish_order_event(db, DELETE, order)
     await db.commit()
     return {"detail": "The order has been deleted"}
 
@@ -127,24 +134,7 @@ async def update_order(
     order_update: OrderUpdate,
     db: AsyncSession = Depends(get_db),
 ):
-    result = await db.execute(
-        select(User).where(User.telegram_user_id == telegram_user_id)
-    )
-    user = result.scalars().first()
-    if not user:
-        raise HTTPException(status_code=404, detail="The user was not found")
-
-    wallet_result = await db.execute(select(Wallet).where(Wallet.user_id == user.id))
-    wallet = wallet_result.scalars().first()
-    if not wallet:
-        raise HTTPException(status_code=404, detail="Wallet not found")
-
-    order_result = await db.execute(
-        select(Order).where(Order.order_id == order_id, Order.wallet_id == wallet.id)
-    )
-    order = order_result.scalars().first()
-    if not order:
-        raise HTTPException(status_code=404, detail="The order was not found")
+    order = await resolve_order(db, telegram_user_id, order_id)
 
     if order.status != OrderStatus.CREATED.value:
         raise HTTPException(
@@ -152,13 +142,27 @@ async def update_order(
             detail="Order editing is not possible, the order status is not 'created'",
         )
 
+    values = {}
     if order_update.price is not None:
-        order.price = order_update.price
+        values["price"] = order_update.price
     if order_update.volume is not None:
-        order.volume = order_update.volume
+        values["volume"] = order_update.volume
     if order_update.jetton_address is not None:
-        order.jetton_address = order_update.jetton_address
+        values["jetton_address"] = order_update.jetton_address
+
+    # Ордер мог уйти на исполнение после чтения: меняем, только пока он CREATED
+    # (status в SET - чтобы запрос без полей тоже проверял статус)
+    result = await db.execute(
+        update(Order)
+        .where(Order.id == order.id, Order.status == OrderStatus.CREATED.value)
+        .values(status=OrderStatus.CREATED.value, **values)
+        .returning(Order)
+        .execution_options(populate_existing=True)
+    )
+    order = result.scalar_one_or_none()
+    if order is None:
+        raise HTTPException(status_code=409, detail=ORDER_EXECUTING)
 
+    await publish_order_event(db, UPSERT, order)
     await db.commit()
-    await db.refresh(order)
     return {"detail": "The order has been updated", "order": order}
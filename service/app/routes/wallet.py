@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
 
 from service.app.database import get_db
-from service.app.models import User, Wallet
-from service.app.security import decrypt_private_key, encrypt_private_key
+from service.app.executor import run_cpu_bound
+from service.app.models import User
+from service.app.routes.common import get_user_and_wallet, resolve_wallet
+from service.app.security import decrypt_private_key
 from service.app.ton_wallet import MyTonClient
+from service.app.wallet_pool import assign_pooled_wallet, generate_wallet_record
 
 router = APIRouter()
 ton_client = MyTonClient()
@@ -15,31 +17,19 @@ ton_client = MyTonClient()
 async def create_or_get_wallet(
     telegram_user_id: str, db: AsyncSession = Depends(get_db)
 ):
-    result = await db.execute(
-        select(User).where(User.telegram_user_id == telegram_user_id)
-    )
-    user = result.scalars().first()
+    user, wallet = await get_user_and_wallet(db, telegram_user_id)
     if not user:
         user = User(telegram_user_id=telegram_user_id)
         db.add(user)
         await db.commit()
         await db.refresh(user)
 
-    w_result = await db.execute(select(Wallet).where(Wallet.user_id == user.id))
-    wallet = w_result.scalars().first()
-
     if not wallet:
-        wallet_data = await ton_client.create_wallet()
-        encrypted_key = encrypt_private_key(wallet_data["private_key"])
-        encrypted_mnemonic = encrypt_private_key(", ".join(wallet_data["mnemonic"]))
-        wallet = Wallet(
-            address=wallet_data["address"],
-            private_key=encrypted_key,
-            mnemonic=encrypted_mnemonic,
-            balance="0",
-            owner=user,
-        )
-        db.add(wallet)
+        # Быстрый путь - готовый кошелек из пула, генерация только если пул пуст
+        wallet = await assign_pooled_wallet(db, user.id)
+        if not wallet:
+            wallet = await generate_wallet_record(ton_client, owner=user)
+            db.add(wallet)
         await db.commit()
         await db.refresh(wallet)
 
@@ -50,19 +40,8 @@ async def create_or_get_wallet(
 
 @router.get("/wallet/export/{telegram_user_id}")
 async def export_wallet(telegram_user_id: str, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(
-        select(User).where(User.telegram_user_id == telegram_user_id)
-    )
-    user = result.scalars().first()
-    if not user:
-        raise HTTPException(status_code=404, detail="The user was not found")
-
-    w_result = await db.execute(select(Wallet).where(Wallet.user_id == user.id))
-    wallet = w_result.scalars().first()
-    if not wallet:
-        raise HTTPException(status_code=404, detail="Wallet not found")
-
+    wallet = await resolve_wallet(db, telegram_user_id)
     return {
         "address": wallet.address,
-        "mnemonic": decrypt_private_key(wallet.mnemonic),
+        "mnemonic": await run_cpu_bound(decrypt_private_key, wallet.mnemonic),
     }
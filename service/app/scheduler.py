@@ -1,98 +1,360 @@
+import asyncio
 import logging
+import time
+from collections import defaultdict
+from typing import List, Tuple
 
+from apscheduler.events import EVENT_JOB_MAX_INSTANCES, EVENT_JOB_MISSED
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from sqlalchemy.future import select
 
+from service.app.circuit_breaker import CircuitOpen
+from service.app.config import settings
 from service.app.database import async_session
+from service.app.leases import WORKER_ID, claim_orders, release_lease
+from service.app.metrics import metrics
 from service.app.models import Order, Wallet
+from service.app.order_events import OrderEventListener
+from service.app.outbox import recover_intents, write_intent
+from service.app.poll_schedule import PollSchedule
+from service.app.quotes import QuoteCoalescer, QuoteCurveCache
+from service.app.rate_limit import QueueTimeout
 from service.app.routes.wallet import ton_client
 from service.app.schemas import OrderStatus, OrderType
+from service.app.status_writer import StatusWriter
+from service.app.ton_wallet import WALLET_MAX_MESSAGES
+from service.app.trigger_book import BookOrder, trigger_book
+from service.app.tx_monitor import TxMonitor
+from service.app.wallet_pool import refill_wallet_pool
 
 logger = logging.getLogger(__name__)
 
+quotes = QuoteCoalescer(ton_client)
+quote_curves = QuoteCurveCache(quotes)
+poll_schedule = PollSchedule()
+status_writer = StatusWriter()
 
-async def check_and_execute_orders():
+
+def still_triggered(order, book_order: BookOrder, price_in_ton: float) -> bool:
+    """
+    Срабатывание по индексу подтверждается строкой из БД: котировка получена для
+    того же рынка и объема и достигает текущей цены ордера.
+    """
+    return (
+        order.jetton_address == book_order.jetton_address
+        and order.order_type == book_order.order_type
+        and order.volume == book_order.volume
+        and price_in_ton >= order.price
+    )
+
+
+async def execute_orders(batch: List[Tuple[BookOrder, float]]):
+    """
+    Исполняет сработавшие ордера одного кошелька (не больше WALLET_MAX_MESSAGES).
+    Несколько ордеров отправляются одной транзакцией кошелька, и их общий
+    tx_hash записывается каждому. Сессия закрывается до отправки свопа; перед
+    отправкой ордера переходят в EXECUTING (outbox), после - в PENDING пачкой
+    через status_writer.
+    """
+    triggered = {book_order.id: (book_order, price) for book_order, price in batch}
+    prices = {order_id: price for order_id, (_, price) in triggered.items()}
     async with async_session() as session:
-        result = await session.execute(
-            select(Order).where(Order.status == OrderStatus.CREATED.value)
-        )
-        orders = result.scalars().all()
+        result = await session.execute(select(Order).where(Order.id.in_(prices)))
+        orders = []
+        found = set()
+        for order in result.scalars():
+            found.add(order.id)
+            book_order, price_in_ton = triggered[order.id]
+            if order.status != OrderStatus.CREATED.value:
+                trigger_book.remove(order.id)
+            elif order.lease_owner != WORKER_ID:
+                # Аренду успел перехватить другой воркер (например, истек LEASE_TTL)
+                continue
+            elif order.order_type not in (OrderType.BUY.value, OrderType.SELL.value):
+                logger.error(f"Неизвестный тип ордера: {order.order_type}")
+                await release_lease(session, order.id)
+            elif not still_triggered(order, book_order, price_in_ton):
+                # Индекс отстал от БД (ордер изменили): котировка к нему не относится
+                logger.warning(
+                    f"Ордер {order.order_id} изменен после срабатывания, исполнение отменено"
+                )
+                trigger_book.upsert(BookOrder.from_order(order))
+                await release_lease(session, order.id)
+            else:
+                orders.append(order)
+        for order_id in prices.keys() - found:
+            trigger_book.remove(order_id)
         if not orders:
-            logger.info("Нет ордеров для исполнения")
             return
 
-        for order in orders:
-            try:
-                price_in_ton = await ton_client.get_current_price(
-                    order.jetton_address, order.order_type, order.volume
-                )
-                logger.info(
-                    f"Ордер {order.order_id}: текущая цена для {order.jetton_address} = {price_in_ton}, целевая цена = {order.price}"
+        wallet_record = await session.get(Wallet, orders[0].wallet_id)
+        if not wallet_record:
+            logger.error(
+                f"Не найден кошелек для ордеров {[o.order_id for o in orders]}"
+            )
+            for order in orders:
+                await release_lease(session, order.id)
+            return
+
+    async def record_intent(transfer):
+        async with async_session() as session:
+            await write_intent(session, wallet_record.id, transfer, orders)
+
+    # Подписанное сообщение сначала сохраняется в outbox и только потом
+    # отправляется: после сбоя его исход сверит recover_intents
+    wallet_obj = await ton_client.restore_wallet(wallet_record)
+    tx_result = await ton_client.swap_batch(
+        wallet_obj,
+        [(order.order_type, order.volume, order.jetton_address) for order in orders],
+        before_send=record_intent,
+    )
+    if len(orders) > 1:
+        metrics.inc("batched_swaps")
+        metrics.inc("batched_swap_orders", len(orders))
+
+    tx_hash = tx_result.get("tx_hash")
+    await asyncio.gather(*(status_writer.submit(order, tx_hash) for order in orders))
+    for order in orders:
+        trigger_book.remove(order.id)
+        logger.info(
+            f"Ордер {order.order_id} исполнен по цене {prices[order.id]}, tx_hash: {tx_hash}"
+        )
+
+
+async def _execute_isolated(
+    batch: List[Tuple[BookOrder, float]], semaphore: asyncio.Semaphore
+):
+    order_ids = ", ".join(order.order_id for order, _ in batch)
+    # Пачки одного кошелька не ждут друг друга: порядок отправки и seqno
+    # обеспечивает ton_client.seqnos
+    async with semaphore:
+        try:
+            await asyncio.wait_for(
+                execute_orders(batch),
+                timeout=settings.SCHEDULER.ORDER_TIMEOUT,
+            )
+        except asyncio.TimeoutError:
+            logger.error(
+                f"Таймаут исполнения ордеров {order_ids} "
+                f"({settings.SCHEDULER.ORDER_TIMEOUT} с)"
+            )
+        except Exception as e:
+            logger.error(f"Ошибка при исполнении ордеров {order_ids}: {e}")
+
+
+def wallet_batches(triggered: List[Tuple[BookOrder, float]]):
+    """
+    Делит сработавшие ордера на пачки по кошельку, не больше WALLET_MAX_MESSAGES
+    в пачке (1, если пакетные свопы выключены).
+    """
+    size = WALLET_MAX_MESSAGES if settings.SCHEDULER.BATCH_SWAPS else 1
+    by_wallet = defaultdict(list)
+    for order, price_in_ton in triggered:
+        by_wallet[order.wallet_id].append((order, price_in_ton))
+    for orders in by_wallet.values():
+        for i in range(0, len(orders), size):
+            yield orders[i : i + size]
+
+
+book_reload_lock = asyncio.Lock()
+
+
+async def load_trigger_book():
+    """Загружает все открытые ордера в индекс срабатывания."""
+    # Только нужные индексу колонки, потоком через серверный курсор: без
+    # ORM-объектов и identity map. Индекс заменяется целиком после чтения,
+    # события, пришедшие во время чтения, повторяются поверх снимка.
+    async with book_reload_lock:
+        trigger_book.begin_load()
+        orders = []
+        try:
+            async with async_session() as session:
+                result = await session.stream(
+                    select(*(getattr(Order, field) for field in BookOrder._fields))
+                    .where(Order.status == OrderStatus.CREATED.value)
+                    .execution_options(yield_per=settings.SCHEDULER.SCAN_BATCH)
                 )
-                if price_in_ton >= order.price:
-                    wallet_result = await session.execute(
-                        select(Wallet).where(Wallet.id == order.wallet_id)
-                    )
-                    wallet_record = wallet_result.scalars().first()
-                    if not wallet_record:
-                        logger.error(f"Не найден кошелек для ордера {order.order_id}")
-                        continue
-
-                    wallet_obj = await ton_client.restore_wallet(wallet_record)
-                    if order.order_type == OrderType.BUY.value:
-                        tx_result = await ton_client.swap_ton_to_jetton(
-                            wallet_obj, order.volume, order.jetton_address
-                        )
-                    elif order.order_type == OrderType.SELL.value:
-                        tx_result = await ton_client.swap_jetton_to_ton(
-                            wallet_obj, order.volume, order.jetton_address
-                        )
-                    else:
-                        logger.error(f"Неизвестный тип ордера: {order.order_type}")
-                        continue
-
-                    order.status = OrderStatus.PENDING.value
-                    order.tx_hash = tx_result.get("tx_hash")
-                    await session.commit()
-                    logger.info(
-                        f"Ордер {order.order_id} исполнен, tx_hash: {order.tx_hash}"
-                    )
-                else:
-                    logger.info(
-                        f"Ордер {order.order_id} не исполнен: текущая цена {price_in_ton} не достигла целевой {order.price}"
-                    )
-            except Exception as e:
-                logger.error(f"Ошибка при исполнении ордера {order.order_id}: {e}")
-                await session.commit()
+                async for partition in result.partitions():
+                    orders.extend(BookOrder(*row) for row in partition)
+        except BaseException:
+            trigger_book.cancel_load()
+            raise
+        trigger_book.load(orders)
+    logger.info(f"Индекс срабатывания загружен: {len(trigger_book)} ордеров")
 
 
-async def monitor_transaction_status():
-    async with async_session() as session:
-        result = await session.execute(
-            select(Order).where(
-                Order.tx_hash.isnot(None), Order.status.in_([OrderStatus.PENDING.value])
+tx_monitor = TxMonitor(ton_client)
+order_listener = OrderEventListener(trigger_book, on_connect=load_trigger_book)
+
+
+async def check_and_execute_orders():
+    keys = live_keys = list(trigger_book.quote_keys())
+    if not keys:
+        logger.info("Нет ордеров для исполнения")
+        return
+
+    if not ton_client.stonfi_breaker.available():
+        # ston.fi недоступен: тик не котирует ничего, пока не придет время пробы
+        metrics.inc("ticks_shed")
+        logger.warning("Котировки пропущены: circuit breaker ston.fi разомкнут")
+        return
+
+    now = time.monotonic()
+    for key, min_price in trigger_book.pop_dirty().items():
+        poll_schedule.level_changed(key, min_price, trigger_book.nearest_level)
+    if settings.SCHEDULER.ADAPTIVE_POLLING:
+        # Котируем только ключи, чья цена могла дойти до ближайшего ордера
+        keys = poll_schedule.due(keys, now)
+        if not keys:
+            return
+
+    # Одна котировка на каждый уникальный рынок/объем, а не на каждый ордер;
+    # с кривыми - несколько запросов на рынок независимо от числа объемов
+    quotes.new_tick()
+    urgent = {key for key in keys if poll_schedule.is_urgent(key)}
+    if settings.SCHEDULER.QUOTE_CURVE_ENABLED:
+        # Кривые строятся по всем ключам индекса, а не только по тем, что пора проверить
+        prices = await quote_curves.get_prices(keys, urgent=urgent, live_keys=live_keys)
+    else:
+        prices = await quotes.get_prices(keys, urgent=urgent)
+    logger.info(f"Котировок запрошено: {len(keys)} для {len(trigger_book)} ордеров")
+
+    triggered = []
+    rejected = 0
+    shed = 0
+    for key, price_in_ton in prices.items():
+        if isinstance(price_in_ton, CircuitOpen):
+            rejected += 1
+            poll_schedule.reset(key)
+            continue
+        if isinstance(price_in_ton, QueueTimeout):
+            shed += 1
+            poll_schedule.reset(key)
+            continue
+        if isinstance(price_in_ton, Exception):
+            logger.error(f"Ошибка получения цены для {key}: {price_in_ton}")
+            poll_schedule.reset(key)
+            continue
+        crossed = trigger_book.crossed(key, price_in_ton)
+        for order in crossed:
+            logger.info(
+                f"Ордер {order.order_id}: текущая цена для {order.jetton_address} = {price_in_ton}, целевая цена = {order.price}"
             )
+            triggered.append((order, price_in_ton))
+        # Пока сработавшие ордера не исполнены, ключ проверяется на каждом тике
+        threshold = (
+            price_in_ton if crossed else trigger_book.nearest_level(key, price_in_ton)
         )
-        orders = result.scalars().all()
-        if not orders:
-            logger.info("Нет ордеров с ожидающим статусом транзакции")
-            return
+        poll_schedule.observe(key, price_in_ton, threshold, now)
 
-        for order in orders:
-            try:
-                tx_status = await ton_client.check_transaction_status(order.tx_hash)
-                logger.info(f"Статус транзакции ордера {order.order_id}: {tx_status}")
-                order.status = tx_status
-                await session.commit()
-            except Exception as e:
-                logger.error(
-                    f"Ошибка проверки транзакции для ордера {order.order_id}: {str(e)}"
-                )
+    if rejected:
+        logger.warning(f"Котировок отклонено circuit breaker: {rejected}")
+    if shed:
+        logger.warning(f"Котировок отброшено из очереди лимита: {shed}")
+    if not triggered:
+        return
+
+    # Исполняем только ордера, взятые в аренду этим воркером вместе с их
+    # кошельками: при нескольких репликах свопы кошелька подписывает одна из них
+    async with async_session() as session:
+        claim = await claim_orders(session, (order.id for order, _ in triggered))
+    # Кошельки, которые до этого вел другой воркер: seqno берется из цепи заново
+    for address in claim.acquired_wallets:
+        ton_client.seqnos.invalidate(address)
+    claimed = set(claim.order_ids)
+    if len(claimed) < len(triggered):
+        logger.info(
+            f"Взято в аренду {len(claimed)} из {len(triggered)} сработавших ордеров"
+        )
+    triggered = [(order, price) for order, price in triggered if order.id in claimed]
+    if not triggered:
+        return
+
+    # В последовательном режиме ордера исполняются по одному, как раньше
+    concurrency = settings.SCHEDULER.CONCURRENCY if settings.SCHEDULER.CONCURRENT else 1
+    semaphore = asyncio.Semaphore(concurrency)
+    # Ордера одного кошелька уходят пачками в одной транзакции
+    await asyncio.gather(
+        *(_execute_isolated(batch, semaphore) for batch in wallet_batches(triggered))
+    )
+
+
+async def run_tick():
+    """Тик проверки ордеров с учетом длительности и переполнений интервала."""
+    started = time.monotonic()
+    try:
+        await check_and_execute_orders()
+    finally:
+        duration = time.monotonic() - started
+        metrics.inc("ticks")
+        metrics.set("tick_duration_seconds", duration)
+        if duration > settings.SCHEDULER.TICK_INTERVAL:
+            metrics.inc("tick_overruns")
+            logger.warning(
+                f"Тик проверки ордеров занял {duration:.2f} с "
+                f"при интервале {settings.SCHEDULER.TICK_INTERVAL} с"
+            )
+
+
+def _on_job_skipped(event):
+    metrics.inc("scheduler_jobs_skipped")
+    logger.warning(f"Запуск задачи {event.job_id} пропущен: предыдущий еще не завершен")
+
+
+async def monitor_transaction_status():
+    await tx_monitor.run()
+
+
+async def log_metrics():
+    logger.info(f"Метрики: {metrics.snapshot()}")
+
+
+async def recover_outbox():
+    await recover_intents(ton_client)
 
 
 async def start_scheduler():
+    # Сначала сверяем отправки, прерванные прошлым запуском: ордера, которые
+    # вернулись в CREATED, попадут в индекс срабатывания
+    await recover_outbox()
+    await load_trigger_book()
+    order_listener.start()
     scheduler = AsyncIOScheduler()
-    scheduler.add_job(check_and_execute_orders, "interval", seconds=1)
-    scheduler.add_job(monitor_transaction_status, "interval", seconds=1)
+    scheduler.add_job(
+        run_tick,
+        "interval",
+        id="check_orders",
+        seconds=settings.SCHEDULER.TICK_INTERVAL,
+    )
+    scheduler.add_job(
+        monitor_transaction_status, "interval", id="monitor_transactions", seconds=1
+    )
+    # Индекс обновляется событиями LISTEN/NOTIFY; полная перезагрузка -
+    # только редкая сверка на случай потерянных событий
+    scheduler.add_job(
+        load_trigger_book,
+        "interval",
+        seconds=settings.SCHEDULER.BOOK_RELOAD_INTERVAL,
+    )
+    scheduler.add_job(
+        recover_outbox,
+        "interval",
+        id="recover_outbox",
+        seconds=settings.SCHEDULER.OUTBOX_RECOVERY_INTERVAL,
+    )
+    scheduler.add_job(log_metrics, "interval", seconds=settings.METRICS_LOG_INTERVAL)
+    if settings.WALLET_POOL.ENABLED:
+        scheduler.add_job(
+            refill_wallet_pool,
+            "interval",
+            args=[ton_client],
+            seconds=settings.WALLET_POOL.REFILL_INTERVAL,
+        )
+    scheduler.add_listener(_on_job_skipped, EVENT_JOB_MISSED | EVENT_JOB_MAX_INSTANCES)
     scheduler.start()
     return scheduler
+
+
+async def stop_scheduler(scheduler: AsyncIOScheduler):
+    scheduler.shutdown(wait=False)
+    await order_listener.stop()
@@ -1,12 +1,13 @@
 import datetime
 from enum import Enum
-from typing import Optional
+from typing import List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class OrderStatus(str, Enum):
     CREATED: str = "CREATED"
+    EXECUTING: str = "EXECUTING"
     PENDING: str = "PENDING"
     EXECUTED: str = "EXECUTED"
     FAILED: str = "FAILED"
@@ -21,14 +22,14 @@ class OrderType(str, Enum):
 class OrderCreate(BaseModel):
     order_type: OrderType
     price: float
-    volume: float
+    volume: float = Field(gt=0, allow_inf_nan=False)
     jetton_address: Optional[str] = None
 
 
 class OrderUpdate(BaseModel):
     order_type: Optional[OrderType] = None
     price: Optional[float] = None
-    volume: Optional[float] = None
+    volume: Optional[float] = Field(None, gt=0, allow_inf_nan=False)
     jetton_address: Optional[str] = None
 
 
@@ -45,3 +46,30 @@ class OrderResponse(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class OrderPage(BaseModel):
+    items: List[OrderResponse]
+    next_cursor: Optional[str] = None
+    has_more: bool
+
+
+class OrderNotificationResponse(BaseModel):
+    id: int
+    telegram_user_id: str
+    order_id: str
+    order_type: str
+    volume: float
+    status: str
+    tx_hash: Optional[str] = None
+
+    class Config:
+        orm_mode = True
+
+
+class NotificationPage(BaseModel):
+    items: List[OrderNotificationResponse]
+
+
+class NotificationAck(BaseModel):
+    ids: List[int]
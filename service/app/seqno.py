@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Dict
+
+import aiohttp
+from tonutils.wallet import WalletV4R2
+
+from service.app.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WalletSeqno:
+    next: int
+    # seqno -> время отправки сообщения, еще не подтвержденного цепью
+    inflight: Dict[int, float] = field(default_factory=dict)
+    synced: bool = True
+
+
+class SeqnoManager:
+    """
+    Локальный учет seqno кошельков для отправки свопов без запроса seqno к API.
+
+    seqno резервируется локально, поэтому свопы одного кошелька уходят друг
+    за другом без ожидания round-trip за get_seqno. Под lock кошелька выполняются
+    только резервирование, подпись, запись в outbox и отправка сообщения (по
+    порядку seqno);
+    подготовка сообщений идет параллельно.
+
+    Подтверждения приходят из мониторинга транзакций и сверки outbox (confirm).
+    Состояние сверяется с цепью при первом использовании кошелька, после ошибки
+    отправки и когда отправленное сообщение не подтверждено дольше timeout
+    (он должен превышать срок действия сообщения SWAP_VALID_FOR): такое
+    сообщение уже не попадет в цепь, и seqno берется из цепи заново.
+    """
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self._states: Dict[str, WalletSeqno] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    @staticmethod
+    async def chain_seqno(client, address: str) -> int:
+        try:
+            return await WalletV4R2.get_seqno(client, address)
+        except aiohttp.ClientResponseError as e:
+            if 400 <= e.status < 500:
+                # Кошелек еще не развернут: первое сообщение с seqno 0 и state_init
+                return 0
+            raise
+
+    async def _state(self, wallet: WalletV4R2, address: str) -> WalletSeqno:
+        state = self._states.get(address)
+        now = time.monotonic()
+        if (
+            state is not None
+            and state.synced
+            and all(now - sent_at < self.timeout for sent_at in state.inflight.values())
+        ):
+            return state
+
+        chain = await self.chain_seqno(wallet.client, address)
+        metrics.inc("seqno_chain_syncs")
+        if state is None:
+            state = WalletSeqno(next=chain)
+        else:
+            # Подтвержденные сообщения больше не ждем, просроченные уже не придут
+            state.inflight = {
+                seqno: sent_at
+                for seqno, sent_at in state.inflight.items()
+                if seqno >= chain
+            }
+            if any(
+                now - sent_at >= self.timeout for sent_at in state.inflight.values()
+            ):
+                logger.warning(
+                    f"Кошелек {address}: seqno {sorted(state.inflight)} не подтверждены, "
+                    f"сверка с цепью (seqno {chain})"
+                )
+                metrics.inc("seqno_resyncs")
+                # Ордера просроченных сообщений возвращает в CREATED сверка outbox
+                state.inflight = {}
+                state.next = chain
+            else:
+                state.next = max(state.next, chain)
+            state.synced = True
+        self._states[address] = state
+        return state
+
+    def confirm(self, address: str, seqno: int) -> None:
+        """Сообщение с seqno попало в цепь: оно и предыдущие больше не ожидаются."""
+        state = self._states.get(address)
+        if state is None:
+            return
+        state.inflight = {
+            pending: sent_at
+            for pending, sent_at in state.inflight.items()
+            if pending > seqno
+        }
+        state.next = max(state.next, seqno + 1)
+        metrics.set(
+            "seqno_inflight", sum(len(s.inflight) for s in self._states.values())
+        )
+
+    def invalidate(self, address: str) -> None:
+        """Сверить seqno кошелька с цепью при следующем резервировании."""
+        state = self._states.get(address)
+        if state is not None:
+            state.synced = False
+
+    @asynccontextmanager
+    async def reserve(self, wallet: WalletV4R2):
+        """
+        Резервирует следующий seqno кошелька на время отправки сообщения.
+        Если отправка завершилась ошибкой, состояние кошелька сверяется с цепью
+        при следующем резервировании.
+        """
+        address = wallet.address.to_str()
+        lock = self._locks.setdefault(address, asyncio.Lock())
+        async with lock:
+            state = await self._state(wallet, address)
+            seqno = state.next
+            try:
+                yield seqno
+            except BaseException:
+                # seqno не расходуется; дошло ли сообщение, покажет сверка с цепью
+                state.synced = False
+                raise
+            state.inflight[seqno] = time.monotonic()
+            state.next = seqno + 1
+            metrics.set(
+                "seqno_inflight", sum(len(s.inflight) for s in self._states.values())
+            )
@@ -0,0 +1,77 @@
+import asyncio
+import logging
+import time
+from typing import List, Optional, Tuple
+
+from sqlalchemy import update
+
+from service.app.database import async_session
+from service.app.metrics import metrics
+from service.app.models import Order
+from service.app.notifications import record_status_changes
+from service.app.schemas import OrderStatus
+
+logger = logging.getLogger(__name__)
+
+
+class StatusWriter:
+    """
+    Групповая запись переходов EXECUTING -> PENDING после отправки свопов.
+
+    Намерение отправки уже сохранено в outbox (service.app.outbox), поэтому эта
+    запись только подтверждает отправку: ордера переходят в PENDING,
+    пользователям пишутся уведомления. Запись outbox остается: отправленное
+    сообщение может не попасть в цепь, и до итогового статуса транзакции его
+    сверяет outbox. Переходы, накопившиеся пока идет предыдущая запись, пишутся
+    следующей записью целиком: один UPDATE и один commit на пачку вместо
+    транзакции на каждый ордер.
+    """
+
+    def __init__(self):
+        self._pending: List[Tuple[object, str, asyncio.Future]] = []
+        self._flusher: Optional[asyncio.Task] = None
+
+    async def submit(self, order, tx_hash: str) -> None:
+        """Подтверждает отправку сообщения tx_hash ордера и ждет записи в БД."""
+        waiter = asyncio.get_running_loop().create_future()
+        self._pending.append((order, tx_hash, waiter))
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_loop())
+        # shield: отмена исполнения ордера не должна отменять запись пачки
+        await asyncio.shield(waiter)
+
+    async def _flush_loop(self) -> None:
+        while self._pending:
+            batch, self._pending = self._pending, []
+            try:
+                await self._write([(order, tx_hash) for order, tx_hash, _ in batch])
+            except Exception as e:
+                logger.error(f"Ошибка записи статусов {len(batch)} ордеров: {e}")
+                for _, _, waiter in batch:
+                    if not waiter.done():
+                        waiter.set_exception(e)
+            else:
+                for _, _, waiter in batch:
+                    if not waiter.done():
+                        waiter.set_result(None)
+
+    @staticmethod
+    async def _write(batch: List[Tuple[object, str]]) -> None:
+        started = time.monotonic()
+        async with async_session() as session:
+            # Ордера, которые уже сверила outbox-сверка, не трогаем
+            result = await session.execute(
+                update(Order)
+                .where(
+                    Order.id.in_([order.id for order, _ in batch]),
+                    Order.status == OrderStatus.EXECUTING.value,
+                )
+                .values(status=OrderStatus.PENDING.value)
+                .returning(Order.id)
+                .execution_options(synchronize_session=False)
+            )
+            await record_status_changes(session, result.scalars().all())
+            await session.commit()
+        metrics.inc("status_flushes")
+        metrics.inc("status_flush_orders", len(batch))
+        metrics.inc("status_flush_seconds", time.monotonic() - started)
@@ -1,15 +1,123 @@
+import asyncio
 import base64
+import time
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
 
+import aiohttp
 import httpx
 from fastapi import HTTPException
+from pytoniq_core import Address
 from tonutils.client import TonapiClient
+from tonutils.jetton.dex.stonfi import StonfiRouterV2
 from tonutils.jetton.dex.stonfi.v2.pton.constants import PTONAddresses
-from tonutils.utils import to_nano
+from tonutils.utils import message_to_boc_hex, to_nano
 from tonutils.wallet import WalletV4R2
 
+from service.app.circuit_breaker import CircuitBreaker
 from service.app.config import settings
+from service.app.executor import run_cpu_bound
+from service.app.metrics import metrics
+from service.app.rate_limit import (
+    SWAP,
+    RateLimiter,
+    UpstreamRateLimited,
+    priority,
+    queue_timeout,
+)
 from service.app.schemas import OrderStatus, OrderType
 from service.app.security import decrypt_private_key
+from service.app.seqno import SeqnoManager
+from service.app.wallet_cache import WalletCache
+
+# WalletV4R2 принимает не больше 4 внутренних сообщений в одном внешнем
+WALLET_MAX_MESSAGES = 4
+
+# Своп для пакетной отправки: (order_type, amount, jetton_address)
+Swap = Tuple[str, float, str]
+
+
+class SignedTransfer(NamedTuple):
+    """Подписанное внешнее сообщение: хэш известен до отправки."""
+
+    boc: str
+    message_hash: str
+    seqno: int
+    valid_until: int
+
+
+def generate_wallet() -> dict:
+    """Генерирует мнемонику и ключи нового кошелька (выполняется в пуле CRYPTO_EXECUTOR)."""
+    wallet, public_key, private_key, mnemonic = WalletV4R2.create(None)
+    return {
+        "address": wallet.address.to_str(),
+        "public_key": base64.b64encode(public_key).decode("utf-8"),
+        "mnemonic": mnemonic,
+        "private_key": base64.b64encode(private_key).decode("utf-8"),
+    }
+
+
+def derive_wallet_keys(encrypted_mnemonic: str) -> Tuple[bytes, bytes]:
+    """
+    Расшифровывает мнемонику и выводит из нее (public_key, private_key).
+    Выполняется в пуле CRYPTO_EXECUTOR: вывод ключа из мнемоники - это PBKDF2.
+    """
+    mnemonic_list = decrypt_private_key(encrypted_mnemonic).split(", ")
+    _, public_key, private_key, _ = WalletV4R2.from_mnemonic(None, mnemonic_list)
+    return public_key, private_key
+
+
+def retry_after(headers) -> float:
+    """Пауза из заголовка Retry-After (секунды) или значение по умолчанию."""
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return settings.RATE_LIMIT.DEFAULT_RETRY_AFTER
+
+
+class LimitedTonapiClient(TonapiClient):
+    """
+    TonapiClient, запросы которого (в т.ч. при свопах) идут через лимитер и
+    circuit breaker tonapi и ограничены дедлайном TONAPI_DEADLINE.
+    """
+
+    def __init__(self, *args, limiter: RateLimiter, breaker: CircuitBreaker, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.limiter = limiter
+        self.breaker = breaker
+        self.timeout = aiohttp.ClientTimeout(total=settings.RATE_LIMIT.TONAPI_DEADLINE)
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        headers: Optional[Dict[str, Any]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        body: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        self.breaker.before_call()
+        try:
+            await self.limiter.acquire(
+                timeout=queue_timeout(settings.RATE_LIMIT.TONAPI_DEADLINE)
+            )
+            content = await super()._request(method, path, headers, params, body)
+        except aiohttp.ClientResponseError as e:
+            if e.status == 429:
+                self.breaker.record_success()
+                self.limiter.pause(retry_after(e.headers or {}))
+                raise UpstreamRateLimited(f"{self.limiter.name}: 429 {path}") from e
+            if e.status >= 500:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            raise
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            self.breaker.release()
+            raise
+        self.breaker.record_success()
+        return content
 
 
 class MyTonClient:
@@ -20,39 +128,153 @@ class MyTonClient:
     ):
         self.api_key = api_key
         self.is_testnet = is_testnet
-        self.client = TonapiClient(api_key=self.api_key, is_testnet=self.is_testnet)
+        # Лимиты общие для котировок, мониторинга транзакций и свопов
+        limits = settings.RATE_LIMIT
+        self.stonfi_limiter = RateLimiter(
+            "stonfi", limits.STONFI_RPS, limits.STONFI_BURST
+        )
+        self.tonapi_limiter = RateLimiter(
+            "tonapi", limits.TONAPI_RPS, limits.TONAPI_BURST
+        )
+        self.stonfi_breaker = CircuitBreaker(
+            "stonfi", limits.BREAKER_FAILURES, limits.BREAKER_RESET_TIMEOUT
+        )
+        self.tonapi_breaker = CircuitBreaker(
+            "tonapi", limits.BREAKER_FAILURES, limits.BREAKER_RESET_TIMEOUT
+        )
+        self.client = LimitedTonapiClient(
+            api_key=self.api_key,
+            is_testnet=self.is_testnet,
+            limiter=self.tonapi_limiter,
+            breaker=self.tonapi_breaker,
+        )
+        self.http = self.create_http_client()
+        self.seqnos = SeqnoManager(timeout=settings.SCHEDULER.SEQNO_TIMEOUT)
+        self.wallet_cache = WalletCache(
+            max_size=settings.WALLET_CACHE_SIZE, ttl=settings.WALLET_CACHE_TTL
+        )
+        # id кошелька -> выполняющийся вывод ключей (single-flight)
+        self._derivations: Dict[int, asyncio.Task] = {}
+
+    @staticmethod
+    def create_http_client() -> httpx.AsyncClient:
+        """
+        Общий пул соединений к api.ston.fi и tonapi.io.
+        Соединения переиспользуются (keep-alive), поэтому TCP+TLS handshake
+        выполняется один раз на соединение, а не на каждый запрос.
+        """
+        http = settings.HTTP
+        return httpx.AsyncClient(
+            http2=http.HTTP2,
+            limits=httpx.Limits(
+                max_connections=http.MAX_CONNECTIONS,
+                max_keepalive_connections=http.MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=http.KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(
+                http.READ_TIMEOUT,
+                connect=http.CONNECT_TIMEOUT,
+                pool=http.POOL_TIMEOUT,
+            ),
+        )
+
+    async def request(
+        self,
+        limiter: RateLimiter,
+        breaker: CircuitBreaker,
+        method: str,
+        url: str,
+        deadline: float,
+        **kwargs,
+    ) -> httpx.Response:
+        """
+        HTTP-запрос через пул соединений с учетом лимита внешнего API.
+        При разомкнутом breaker запрос сразу отклоняется (CircuitOpen), весь
+        запрос ограничен дедлайном deadline; таймауты, сетевые ошибки и 5xx
+        считаются отказами API. Плановый запрос, который не дождался токена
+        лимита за deadline, отбрасывается (QueueTimeout) - это перегрузка
+        очереди, а не отказ API, и breaker ее не учитывает.
+        """
+        breaker.before_call()
+        try:
+            await limiter.acquire(timeout=queue_timeout(deadline))
+            response = await asyncio.wait_for(
+                self.http.request(method, url, **kwargs), deadline
+            )
+        except (httpx.TransportError, asyncio.TimeoutError):
+            breaker.record_failure()
+            metrics.inc(f"upstream_{limiter.name}_failures")
+            raise
+        except BaseException:
+            breaker.release()
+            raise
+        if response.status_code >= 500:
+            breaker.record_failure()
+            metrics.inc(f"upstream_{limiter.name}_failures")
+        else:
+            breaker.record_success()
+        if response.status_code == 429:
+            limiter.pause(retry_after(response.headers))
+            raise UpstreamRateLimited(f"{limiter.name}: 429 {url}")
+        return response
+
+    async def aclose(self):
+        """Закрывает пул HTTP-соединений и затирает кэш ключей."""
+        await self.http.aclose()
+        self.wallet_cache.clear()
 
     async def create_wallet(self) -> dict:
         """
         Создает новый TON-кошелек с использованием WalletV4R2.
         Возвращает адрес, публичный ключ, мнемонику и зашифрованный приватный ключ.
         Байтовые данные кодируются в base64 для корректной сериализации в JSON.
-        При создании кошелек сохраняется в памяти для дальнейшего использования.
-        """
-        wallet, public_key, private_key, mnemonic = WalletV4R2.create(self.client)
-        encoded_public_key = base64.b64encode(public_key).decode("utf-8")
-        encoded_private_key = base64.b64encode(private_key).decode("utf-8")
-        wallet_address = wallet.address.to_str()
-        return {
-            "address": wallet_address,
-            "public_key": encoded_public_key,
-            "mnemonic": mnemonic,
-            "private_key": encoded_private_key,
-        }
+        Генерация ключей выполняется в пуле CRYPTO_EXECUTOR, а не в event loop.
+        """
+        return await run_cpu_bound(generate_wallet)
 
     async def restore_wallet(self, wallet_record) -> WalletV4R2:
         """
         Восстанавливает объект кошелька (WalletV4R2) из данных, хранящихся в БД.
         Расшифровываем сохраненную мнемонику, делим строку по разделителю "; " и используем from_mnemonic.
+        Ключи кэшируются по id кошелька, повторный вызов не выводит ключ заново;
+        параллельные вызовы для одного кошелька ждут один и тот же вывод ключа.
         """
-        decrypted_mnemonic = decrypt_private_key(wallet_record.mnemonic)
-        mnemonic_list = decrypted_mnemonic.split(", ")
-        wallet_obj, _, _, _ = WalletV4R2.from_mnemonic(self.client, mnemonic_list)
-        return wallet_obj
+        keys = self.wallet_cache.get(wallet_record.id)
+        if keys is not None:
+            # Объект кошелька по готовым ключам строится без вывода ключа из мнемоники
+            derivations = metrics.get("wallet_derivations")
+            if derivations:
+                metrics.inc(
+                    "wallet_derivation_seconds_saved",
+                    metrics.get("wallet_derivation_seconds") / derivations,
+                )
+            public_key, private_key = keys
+            return WalletV4R2(self.client, public_key, private_key)
+
+        wallet_id = wallet_record.id
+        task = self._derivations.get(wallet_id)
+        if task is None:
+            task = asyncio.ensure_future(self._derive_keys(wallet_record))
+            self._derivations[wallet_id] = task
+            task.add_done_callback(lambda _: self._derivations.pop(wallet_id, None))
+        else:
+            metrics.inc("wallet_derivations_shared")
+        # shield: отмена одного ожидающего не должна отменять вывод для остальных
+        public_key, private_key = await asyncio.shield(task)
+        return WalletV4R2(self.client, public_key, private_key)
+
+    async def _derive_keys(self, wallet_record) -> Tuple[bytes, bytes]:
+        started = time.perf_counter()
+        public_key, private_key = await run_cpu_bound(
+            derive_wallet_keys, wallet_record.mnemonic
+        )
+        metrics.inc("wallet_derivations")
+        metrics.inc("wallet_derivation_seconds", time.perf_counter() - started)
+        self.wallet_cache.put(wallet_record.id, public_key, private_key)
+        return public_key, private_key
 
-    @staticmethod
     async def swap_ton_to_jetton(
-        wallet: WalletV4R2, amount: float, jetton_address: str
+        self, wallet: WalletV4R2, amount: float, jetton_address: str
     ) -> dict:
         """
         Выполняет своп TON в Jetton.
@@ -62,18 +284,12 @@ class MyTonClient:
         :param jetton_address: Адрес Jetton, в который необходимо обменять.
         :return: Словарь с результатом транзакции (tx_hash и статус).
         """
-        try:
-            tx_hash = await wallet.stonfi_swap_ton_to_jetton(
-                jetton_master_address=jetton_address,
-                ton_amount=amount,
-                version=2,
-            )
-            return {"tx_hash": tx_hash, "status": "submitted"}
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=str(e))
+        return await self.swap_batch(
+            wallet, [(OrderType.BUY.value, amount, jetton_address)]
+        )
 
-    @staticmethod
     async def swap_jetton_to_ton(
+        self,
         wallet: WalletV4R2,
         amount: float,
         jetton_address: str,
@@ -87,19 +303,109 @@ class MyTonClient:
         :param jetton_address: Адрес Jetton, который будет обменян на TON.
         :return: Словарь с результатом транзакции (tx_hash и статус).
         """
-        try:
-            tx_hash = await wallet.stonfi_swap_jetton_to_ton(
-                jetton_master_address=jetton_address,
-                jetton_amount=amount,
-                jetton_decimals=jetton_decimals,
-                version=2,
+        return await self.swap_batch(
+            wallet,
+            [(OrderType.SELL.value, amount, jetton_address)],
+            jetton_decimals=jetton_decimals,
+        )
+
+    @staticmethod
+    async def _swap_message(
+        router: StonfiRouterV2, wallet: WalletV4R2, swap: Swap, jetton_decimals: int
+    ):
+        order_type, amount, jetton_address = swap
+        if order_type == OrderType.BUY.value:
+            to, value, body = await router.get_swap_ton_to_jetton_tx_params(
+                user_wallet_address=wallet.address,
+                receiver_address=wallet.address,
+                offer_jetton_address=Address(jetton_address),
+                offer_amount=to_nano(amount),
+                min_ask_amount=0,
+                refund_address=wallet.address,
+            )
+        elif order_type == OrderType.SELL.value:
+            to, value, body = await router.get_swap_jetton_to_ton_tx_params(
+                offer_jetton_address=Address(jetton_address),
+                receiver_address=wallet.address,
+                user_wallet_address=wallet.address,
+                offer_amount=to_nano(amount, jetton_decimals),
+                min_ask_amount=0,
+                refund_address=wallet.address,
+            )
+        else:
+            raise ValueError(f"Неизвестный тип ордера: {order_type}")
+        return wallet.create_wallet_internal_message(
+            destination=to, value=value, body=body, bounce=True
+        )
+
+    @staticmethod
+    def sign_transfer(
+        wallet: WalletV4R2, messages: list, seqno: int, valid_until: int
+    ) -> SignedTransfer:
+        """
+        Подписывает внешнее сообщение с фиксированными seqno и valid_until,
+        поэтому его хэш детерминирован и может быть сохранен до отправки.
+        """
+        body = wallet.raw_create_transfer_msg(
+            private_key=wallet.private_key,
+            messages=messages,
+            seqno=seqno,
+            valid_until=valid_until,
+        )
+        state_init = wallet.state_init if seqno == 0 else None
+        message = wallet.create_external_msg(
+            dest=wallet.address, body=body, state_init=state_init
+        )
+        boc, message_hash = message_to_boc_hex(message)
+        return SignedTransfer(boc, message_hash, seqno, valid_until)
+
+    async def swap_batch(
+        self,
+        wallet: WalletV4R2,
+        swaps: List[Swap],
+        jetton_decimals: int = 9,
+        before_send: Optional[Callable[[SignedTransfer], Awaitable[None]]] = None,
+    ) -> dict:
+        """
+        Выполняет несколько свопов (TON -> Jetton и Jetton -> TON) одним внешним
+        сообщением: один seqno и одна транзакция кошелька на всю пачку.
+
+        :param wallet: Кошелек, из которого выполняется транзакция.
+        :param swaps: До WALLET_MAX_MESSAGES свопов (order_type, amount, jetton_address).
+        :param before_send: Вызывается с подписанным сообщением до отправки
+            (запись в outbox); если он завершился ошибкой, сообщение не отправляется.
+        :return: Словарь с результатом транзакции (общий tx_hash и статус).
+        """
+        if len(swaps) > WALLET_MAX_MESSAGES:
+            raise ValueError(
+                f"Не больше {WALLET_MAX_MESSAGES} свопов в одной транзакции"
             )
+        try:
+            with priority(SWAP):
+                router = StonfiRouterV2(wallet.client)
+                messages = await asyncio.gather(
+                    *(
+                        self._swap_message(router, wallet, swap, jetton_decimals)
+                        for swap in swaps
+                    )
+                )
+                # seqno резервируется локально, без запроса к API на каждый своп
+                async with self.seqnos.reserve(wallet) as seqno:
+                    transfer = self.sign_transfer(
+                        wallet,
+                        list(messages),
+                        seqno,
+                        int(time.time()) + settings.SCHEDULER.SWAP_VALID_FOR,
+                    )
+                    if before_send is not None:
+                        await before_send(transfer)
+                    await self.client.send_message(transfer.boc)
+                tx_hash = transfer.message_hash
             return {"tx_hash": tx_hash, "status": "submitted"}
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
-    @staticmethod
-    async def check_transaction_status(tx_hash: str) -> str:
+    async def check_transaction_status(self, tx_hash: str) -> str:
         """
         Проверяет статус транзакции по tx_hash, обращаясь к TON API.
         URL: https://tonapi.io/v2/blockchain/transactions/{tx_hash}
@@ -112,11 +418,54 @@ class MyTonClient:
         Иначе возвращается "processing".
         """
         url = f"https://tonapi.io/v2/blockchain/transactions/{tx_hash}"
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url)
-            response.raise_for_status()
-            data = response.json()
+        response = await self.request(
+            self.tonapi_limiter,
+            self.tonapi_breaker,
+            "GET",
+            url,
+            settings.RATE_LIMIT.TX_STATUS_DEADLINE,
+        )
+        response.raise_for_status()
+        return self.transaction_status(response.json())
 
+    async def get_message_transaction(self, message_hash: str) -> Optional[dict]:
+        """
+        Транзакция, порожденная внешним сообщением, или None, если ее нет в цепи.
+        URL: https://tonapi.io/v2/blockchain/messages/{message_hash}/transaction
+        """
+        url = f"https://tonapi.io/v2/blockchain/messages/{message_hash}/transaction"
+        response = await self.request(
+            self.tonapi_limiter,
+            self.tonapi_breaker,
+            "GET",
+            url,
+            settings.RATE_LIMIT.TX_STATUS_DEADLINE,
+        )
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.json()
+
+    async def get_account_transactions(self, address: str, limit: int) -> list:
+        """
+        Последние транзакции аккаунта одним запросом к TON API.
+        URL: https://tonapi.io/v2/blockchain/accounts/{address}/transactions
+        """
+        url = f"https://tonapi.io/v2/blockchain/accounts/{address}/transactions"
+        response = await self.request(
+            self.tonapi_limiter,
+            self.tonapi_breaker,
+            "GET",
+            url,
+            settings.RATE_LIMIT.TX_STATUS_DEADLINE,
+            params={"limit": limit},
+        )
+        response.raise_for_status()
+        return response.json().get("transactions", [])
+
+    @staticmethod
+    def transaction_status(data: dict) -> str:
+        """Статус ордера по JSON транзакции TON API (success / aborted / destroyed)."""
         success = data.get("success", False)
         aborted = data.get("aborted", False)
         destroyed = data.get("destroyed", False)
@@ -128,9 +477,8 @@ class MyTonClient:
         else:
             return OrderStatus.PENDING.value
 
-    @staticmethod
     async def get_current_price(
-        jetton_address: str, order_type: str, amount: float
+        self, jetton_address: str, order_type: str, amount: float
     ) -> float:
         url = "https://api.ston.fi/v1/swap/simulate"
         headers = {"Accept": "application/json"}
@@ -154,18 +502,25 @@ class MyTonClient:
             "dex_v2": "true",
         }
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, params=params, headers=headers)
-            if response.status_code == 200:
-                content = response.json()
-                swap_rate_str = content.get("swap_rate")
-                return (
-                    1 / float(swap_rate_str)
-                    if order_type == OrderType.BUY.value
-                    else float(swap_rate_str)
-                )
-            else:
-                error_text = response.text
-                raise Exception(
-                    f"Не удалось получить swap_rate: {response.status_code}: {error_text}"
-                )
+        response = await self.request(
+            self.stonfi_limiter,
+            self.stonfi_breaker,
+            "POST",
+            url,
+            settings.RATE_LIMIT.QUOTE_DEADLINE,
+            params=params,
+            headers=headers,
+        )
+        if response.status_code == 200:
+            content = response.json()
+            swap_rate_str = content.get("swap_rate")
+            return (
+                1 / float(swap_rate_str)
+                if order_type == OrderType.BUY.value
+                else float(swap_rate_str)
+            )
+        else:
+            error_text = response.text
+            raise Exception(
+                f"Не удалось получить swap_rate: {response.status_code}: {error_text}"
+            )
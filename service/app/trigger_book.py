@@ -0,0 +1,147 @@
+from bisect import bisect_left, bisect_right, insort
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from service.app.quotes import QuoteKey
+
+MarketKey = Tuple[str, str]
+
+
+class BookOrder(NamedTuple):
+    id: int
+    order_id: str
+    wallet_id: int
+    jetton_address: str
+    order_type: str
+    price: float
+    volume: float
+
+    @classmethod
+    def from_order(cls, order) -> "BookOrder":
+        return cls(
+            id=order.id,
+            order_id=order.order_id,
+            wallet_id=order.wallet_id,
+            jetton_address=order.jetton_address,
+            order_type=order.order_type,
+            price=order.price,
+            volume=order.volume,
+        )
+
+
+class TriggerBook:
+    """
+    Индекс открытых ордеров для проверки срабатывания.
+
+    Ордера разложены по рынкам (jetton_address, order_type), внутри рынка - по объему
+    (котировка зависит от объема), а внутри объема хранятся отсортированные ценовые
+    уровни (price, id). Ордер срабатывает, когда котировка >= его цены, поэтому
+    сработавшие ордера для котировки - это префикс уровней: O(log n + k).
+    Ключи котировок, в которые добавлялись ордера, копятся до pop_dirty() вместе
+    с минимальной ценой добавленного ордера.
+
+    Перезагрузка из БД идет в два шага: begin_load() перед чтением снимка и
+    load() после. Изменения между ними применяются к текущему индексу и
+    запоминаются, а после load() повторяются поверх снимка: события, пришедшие
+    во время чтения, не теряются и не откатываются снимком.
+    """
+
+    def __init__(self):
+        self._markets: Dict[MarketKey, Dict[float, List[Tuple[float, int]]]] = {}
+        self._orders: Dict[int, BookOrder] = {}
+        self._dirty: Dict[QuoteKey, float] = {}
+        self._replay: Optional[List[Tuple[Callable, object]]] = None
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    def __contains__(self, order_id: int) -> bool:
+        return order_id in self._orders
+
+    def begin_load(self) -> None:
+        """Начинает перезагрузку: изменения до load() будут повторены после нее."""
+        self._replay = []
+
+    def cancel_load(self) -> None:
+        self._replay = None
+
+    def load(self, orders: Iterable[BookOrder]) -> None:
+        """Полностью пересобирает индекс из переданных ордеров."""
+        replay, self._replay = self._replay or [], None
+        self._markets = {}
+        self._orders = {}
+        for order in orders:
+            self.upsert(order)
+        for change, arg in replay:
+            change(arg)
+
+    def upsert(self, order: BookOrder) -> None:
+        if self._replay is not None:
+            self._replay.append((self.upsert, order))
+        self._remove(order.id)
+        market = self._markets.setdefault((order.jetton_address, order.order_type), {})
+        insort(market.setdefault(order.volume, []), (order.price, order.id))
+        self._orders[order.id] = order
+        key = (order.jetton_address, order.order_type, order.volume)
+        self._dirty[key] = min(order.price, self._dirty.get(key, order.price))
+
+    def pop_dirty(self) -> Dict[QuoteKey, float]:
+        """
+        Ключи котировок, в которые добавлялись ордера с прошлого вызова, и
+        минимальная цена добавленных в ключ ордеров.
+        """
+        dirty, self._dirty = self._dirty, {}
+        return dirty
+
+    def remove(self, order_id: int) -> None:
+        if self._replay is not None:
+            self._replay.append((self.remove, order_id))
+        self._remove(order_id)
+
+    def _remove(self, order_id: int) -> None:
+        order = self._orders.pop(order_id, None)
+        if order is None:
+            return
+        market_key = (order.jetton_address, order.order_type)
+        market = self._markets[market_key]
+        levels = market[order.volume]
+        del levels[bisect_left(levels, (order.price, order.id))]
+        if not levels:
+            del market[order.volume]
+            if not market:
+                del self._markets[market_key]
+
+    def quote_keys(self) -> Iterator[QuoteKey]:
+        """Уникальные ключи котировок, которые нужны для проверки всех ордеров."""
+        for (jetton_address, order_type), market in self._markets.items():
+            for volume in market:
+                yield jetton_address, order_type, volume
+
+    def crossed(self, key: QuoteKey, price: float) -> List[BookOrder]:
+        """Ордера с ключом key, чья целевая цена достигнута котировкой price."""
+        jetton_address, order_type, volume = key
+        levels = self._markets.get((jetton_address, order_type), {}).get(volume)
+        if not levels:
+            return []
+        end = bisect_right(levels, (price, float("inf")))
+        return [self._orders[order_id] for _, order_id in levels[:end]]
+
+    def nearest_level(self, key: QuoteKey, price: float) -> Optional[float]:
+        """Ближайшая цена ордера с ключом key, еще не достигнутая котировкой price."""
+        jetton_address, order_type, volume = key
+        levels = self._markets.get((jetton_address, order_type), {}).get(volume)
+        if not levels:
+            return None
+        end = bisect_right(levels, (price, float("inf")))
+        return levels[end][0] if end < len(levels) else None
+
+
+trigger_book = TriggerBook()
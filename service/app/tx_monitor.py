@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from sqlalchemy import case, delete, update
+from sqlalchemy.future import select
+
+from service.app.config import settings
+from service.app.database import async_session
+from service.app.metrics import metrics
+from service.app.models import Order, SwapIntent, Wallet
+from service.app.notifications import record_status_changes
+from service.app.schemas import OrderStatus
+from service.app.ton_wallet import MyTonClient
+
+logger = logging.getLogger(__name__)
+
+
+class TxMonitor:
+    """
+    Мониторинг транзакций ордеров в статусе PENDING.
+
+    Ордера группируются по кошельку: статусы всех ожидающих транзакций кошелька
+    определяются одним запросом последних транзакций аккаунта. Каждый ордер
+    проверяется с экспоненциальной задержкой (чем дольше ждет, тем реже), а все
+    изменения статусов за цикл записываются одним UPDATE вместе с
+    уведомлениями пользователей и удалением записей outbox этих сообщений.
+    seqno сообщений с итоговым статусом подтверждаются в SeqnoManager клиента.
+    """
+
+    def __init__(self, client: MyTonClient):
+        self.client = client
+        # id ордера -> (время следующей проверки, число проверок)
+        self._schedule: Dict[int, Tuple[float, int]] = {}
+
+    def _is_due(self, order_id: int, now: float) -> bool:
+        next_check_at, _ = self._schedule.get(order_id, (0.0, 0))
+        return next_check_at <= now
+
+    def _attempts(self, order_id: int) -> int:
+        return self._schedule.get(order_id, (0.0, 0))[1]
+
+    def _backoff(self, order_id: int, now: float) -> None:
+        attempts = self._attempts(order_id) + 1
+        delay = min(
+            settings.SCHEDULER.TX_CHECK_MAX_INTERVAL,
+            settings.SCHEDULER.TX_CHECK_BASE_INTERVAL * 2 ** (attempts - 1),
+        )
+        self._schedule[order_id] = (now + delay, attempts)
+
+    async def _check_wallet(self, address: str, rows: List) -> Dict[int, str]:
+        """Итоговые статусы (EXECUTED/FAILED) ордеров одного кошелька."""
+        transactions = await self.client.get_account_transactions(
+            address, settings.SCHEDULER.TX_ACCOUNT_LIMIT
+        )
+        metrics.inc("tx_monitor_account_requests")
+        # tx_hash ордера - хэш внешнего сообщения, поэтому ищем и по хэшу
+        # транзакции, и по хэшу входящего сообщения
+        by_hash = {}
+        for transaction in transactions:
+            status = self.client.transaction_status(transaction)
+            by_hash[transaction.get("hash", "").lower()] = status
+            in_msg_hash = (transaction.get("in_msg") or {}).get("hash")
+            if in_msg_hash:
+                by_hash[in_msg_hash.lower()] = status
+
+        statuses = {}
+        for row in rows:
+            status = by_hash.get(row.tx_hash.lower())
+            if (
+                status is None
+                and self._attempts(row.id) >= settings.SCHEDULER.TX_HASH_FALLBACK_AFTER
+            ):
+                # Транзакция не попала в последние N транзакций аккаунта: ищем
+                # ее по хэшу внешнего сообщения
+                try:
+                    transaction = await self.client.get_message_transaction(row.tx_hash)
+                    metrics.inc("tx_monitor_hash_requests")
+                    if transaction is not None:
+                        status = self.client.transaction_status(transaction)
+                except Exception as e:
+                    logger.error(
+                        f"Ошибка проверки транзакции для ордера {row.order_id}: {e}"
+                    )
+            if status is not None and status != OrderStatus.PENDING.value:
+                statuses[row.id] = status
+                logger.info(f"Статус транзакции ордера {row.order_id}: {status}")
+        return statuses
+
+    async def run(self):
+        # Строки читаются потоком через серверный курсор: в памяти остаются
+        # только id ожидающих ордеров и строки, которые пора проверять
+        now = time.monotonic()
+        pending_ids = set()
+        by_wallet = defaultdict(list)
+        async with async_session() as session:
+            result = await session.stream(
+                select(
+                    Order.id,
+                    Order.order_id,
+                    Order.tx_hash,
+                    Wallet.address,
+                    SwapIntent.seqno,
+                )
+                .join(Wallet, Wallet.id == Order.wallet_id)
+                .outerjoin(SwapIntent, SwapIntent.message_hash == Order.tx_hash)
+                .where(
+                    Order.tx_hash.isnot(None),
+                    Order.status == OrderStatus.PENDING.value,
+                )
+                .execution_options(yield_per=settings.SCHEDULER.SCAN_BATCH)
+            )
+            async for partition in result.partitions():
+                for row in partition:
+                    pending_ids.add(row.id)
+                    if self._is_due(row.id, now):
+                        by_wallet[row.address].append(row)
+        if not pending_ids:
+            self._schedule.clear()
+            logger.info("Нет ордеров с ожидающим статусом транзакции")
+            return
+
+        self._schedule = {
+            order_id: state
+            for order_id, state in self._schedule.items()
+            if order_id in pending_ids
+        }
+        if not by_wallet:
+            return
+
+        results = await asyncio.gather(
+            *(self._check_wallet(address, rows) for address, rows in by_wallet.items()),
+            return_exceptions=True,
+        )
+        statuses = {}
+        # хэш сообщения -> (кошелек, seqno) для сообщений с итоговым статусом
+        finished = {}
+        for (address, rows), result in zip(by_wallet.items(), results):
+            if isinstance(result, Exception):
+                logger.error(f"Ошибка проверки транзакций кошелька {address}: {result}")
+                result = {}
+            statuses.update(result)
+            for row in rows:
+                if row.id not in result:
+                    self._backoff(row.id, now)
+                elif row.seqno is not None:
+                    finished[row.tx_hash] = (address, row.seqno)
+
+        if not statuses:
+            return
+        async with async_session() as session:
+            result = await session.execute(
+                update(Order)
+                .where(
+                    Order.id.in_(statuses),
+                    Order.status == OrderStatus.PENDING.value,
+                )
+                .values(status=case(statuses, value=Order.id))
+                .returning(Order.id)
+                .execution_options(synchronize_session=False)
+            )
+            await record_status_changes(session, result.scalars().all())
+            if finished:
+                await session.execute(
+                    delete(SwapIntent).where(SwapIntent.message_hash.in_(finished))
+                )
+            await session.commit()
+        for address, seqno in finished.values():
+            self.client.seqnos.confirm(address, seqno)
+        metrics.inc("tx_monitor_status_updates", len(statuses))
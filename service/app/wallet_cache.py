@@ -0,0 +1,77 @@
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from service.app.metrics import metrics
+
+KeyPair = Tuple[bytes, bytearray]
+
+
+def _zero(buffer: bytearray) -> None:
+    buffer[:] = bytes(len(buffer))
+
+
+class WalletCache:
+    """
+    Ограниченный кэш ключей восстановленных кошельков с вытеснением по TTL и LRU.
+
+    Ключ - id кошелька в БД, значение - (public_key, private_key), полученные из
+    мнемоники (PBKDF2, дорогая операция). Сам объект WalletV4R2 по паре ключей
+    строится дешево, поэтому в кэше хранятся только ключи: приватный ключ лежит
+    в bytearray и затирается нулями при вытеснении или инвалидации, не ломая
+    кошельки, которые в этот момент подписывают транзакции.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[int, Tuple[float, KeyPair]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, wallet_id: int) -> Optional[Tuple[bytes, bytes]]:
+        entry = self._entries.get(wallet_id)
+        if entry is not None and entry[0] < time.monotonic():
+            self.invalidate(wallet_id)
+            entry = None
+        if entry is None:
+            metrics.inc("wallet_cache_misses")
+            self._update_hit_rate()
+            return None
+        self._entries.move_to_end(wallet_id)
+        metrics.inc("wallet_cache_hits")
+        self._update_hit_rate()
+        public_key, private_key = entry[1]
+        return public_key, bytes(private_key)
+
+    def put(self, wallet_id: int, public_key: bytes, private_key: bytes) -> None:
+        self.invalidate(wallet_id)
+        self._entries[wallet_id] = (
+            time.monotonic() + self.ttl,
+            (public_key, bytearray(private_key)),
+        )
+        while len(self._entries) > self.max_size:
+            self._evict(next(iter(self._entries)))
+        metrics.set("wallet_cache_size", len(self._entries))
+
+    def invalidate(self, wallet_id: int) -> None:
+        """Удаляет ключи кошелька из кэша, затирая приватный ключ."""
+        if wallet_id in self._entries:
+            self._evict(wallet_id)
+
+    def clear(self) -> None:
+        for wallet_id in list(self._entries):
+            self._evict(wallet_id)
+
+    def _evict(self, wallet_id: int) -> None:
+        _, (_, private_key) = self._entries.pop(wallet_id)
+        _zero(private_key)
+        metrics.inc("wallet_cache_evictions")
+        metrics.set("wallet_cache_size", len(self._entries))
+
+    @staticmethod
+    def _update_hit_rate() -> None:
+        hits = metrics.get("wallet_cache_hits")
+        total = hits + metrics.get("wallet_cache_misses")
+        metrics.set("wallet_cache_hit_rate", hits / total if total else 0.0)
@@ -0,0 +1,100 @@
+import asyncio
+import logging
+from typing import Optional
+
+from sqlalchemy import func, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from service.app.config import settings
+from service.app.database import async_session
+from service.app.executor import run_cpu_bound
+from service.app.metrics import metrics
+from service.app.models import Wallet
+from service.app.security import encrypt_private_key
+from service.app.ton_wallet import MyTonClient
+
+logger = logging.getLogger(__name__)
+
+# Ключ advisory lock: пул пополняет только один процесс одновременно
+WALLET_POOL_LOCK_ID = 7_340_001
+
+
+async def generate_wallet_record(ton_client: MyTonClient, **kwargs) -> Wallet:
+    """Генерирует новый кошелек и возвращает запись Wallet с зашифрованными ключами."""
+    wallet_data = await ton_client.create_wallet()
+    encrypted_key = await run_cpu_bound(encrypt_private_key, wallet_data["private_key"])
+    encrypted_mnemonic = await run_cpu_bound(
+        encrypt_private_key, ", ".join(wallet_data["mnemonic"])
+    )
+    return Wallet(
+        address=wallet_data["address"],
+        private_key=encrypted_key,
+        mnemonic=encrypted_mnemonic,
+        balance="0",
+        **kwargs,
+    )
+
+
+async def assign_pooled_wallet(db: AsyncSession, user_id: int) -> Optional[Wallet]:
+    """
+    Отдает пользователю заранее созданный кошелек из пула одним UPDATE.
+    SKIP LOCKED не дает двум параллельным запросам получить один кошелек.
+    Возвращает None, если пул пуст.
+    """
+    free_wallet = (
+        select(Wallet.id)
+        .where(Wallet.user_id.is_(None))
+        .order_by(Wallet.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        update(Wallet)
+        .where(Wallet.id == free_wallet)
+        .values(user_id=user_id)
+        .returning(Wallet)
+        .execution_options(synchronize_session=False)
+    )
+    wallet = result.scalars().first()
+    metrics.inc("wallet_pool_hits" if wallet else "wallet_pool_misses")
+    return wallet
+
+
+async def refill_wallet_pool(ton_client: MyTonClient):
+    """
+    Пополняет пул свободных кошельков до WALLET_POOL.TARGET,
+    когда их становится меньше WALLET_POOL.LOW_WATER.
+    """
+    pool_settings = settings.WALLET_POOL
+    async with async_session() as session:
+        locked = await session.scalar(
+            select(func.pg_try_advisory_xact_lock(WALLET_POOL_LOCK_ID))
+        )
+        if not locked:
+            return
+
+        available = await session.scalar(
+            select(func.count(Wallet.id)).where(Wallet.user_id.is_(None))
+        )
+        metrics.set("wallet_pool_available", available)
+        if available >= pool_settings.LOW_WATER:
+            return
+
+        missing = pool_settings.TARGET - available
+        while missing > 0:
+            batch = min(missing, pool_settings.BATCH)
+            wallets = await asyncio.gather(
+                *(generate_wallet_record(ton_client) for _ in range(batch))
+            )
+            session.add_all(wallets)
+            await session.flush()
+            missing -= batch
+        await session.commit()
+
+    metrics.set("wallet_pool_available", pool_settings.TARGET)
+    logger.info(
+        f"Пул кошельков пополнен: {pool_settings.TARGET - available} новых, "
+        f"доступно {pool_settings.TARGET}"
+    )
@@ -0,0 +1,46 @@
+"""
+Отдельный процесс движка ордеров.
+
+Запуск из корня репозитория: python -m service.app.worker
+Применяет миграции и запускает циклы исполнения ордеров и мониторинга
+транзакций со своим пулом соединений к БД, независимо от API. В API-процессах движок при этом
+отключается через SCHEDULER_ENABLED=false.
+"""
+
+import asyncio
+import logging
+import signal
+
+from service.app.database import engine, run_migrations
+from service.app.executor import shutdown_executor
+from service.app.routes.wallet import ton_client
+from service.app.scheduler import start_scheduler, stop_scheduler
+
+logger = logging.getLogger(__name__)
+
+
+async def run_worker():
+    await run_migrations()
+    scheduler = await start_scheduler()
+    logger.info("Воркер исполнения ордеров запущен")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
+
+    logger.info("Остановка воркера исполнения ордеров")
+    await stop_scheduler(scheduler)
+    await ton_client.aclose()
+    shutdown_executor()
+    await engine.dispose()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_worker())
+
+
+if __name__ == "__main__":
+    main()
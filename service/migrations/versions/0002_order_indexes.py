@@ -0,0 +1,47 @@
+"""indexes for scheduler and route lookups
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16 12:30:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Частичные индексы: размер зависит от числа открытых/ожидающих ордеров,
+    # а не от всей истории
+    op.create_index(
+        "ix_orders_open",
+        "orders",
+        ["jetton_address", "order_type", "price"],
+        postgresql_where=sa.text("status = 'CREATED'"),
+    )
+    op.create_index(
+        "ix_orders_pending",
+        "orders",
+        ["wallet_id", "id"],
+        postgresql_where=sa.text("status = 'PENDING' AND tx_hash IS NOT NULL"),
+    )
+    # Список ордеров кошелька с keyset-пагинацией по (timestamp, id)
+    op.create_index(
+        "ix_orders_wallet_timestamp", "orders", ["wallet_id", "timestamp", "id"]
+    )
+    op.create_index("ix_wallets_user_id", "wallets", ["user_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_wallets_user_id", table_name="wallets")
+    op.drop_index("ix_orders_wallet_timestamp", table_name="orders")
+    op.drop_index("ix_orders_pending", table_name="orders")
+    op.drop_index("ix_orders_open", table_name="orders")
@@ -0,0 +1,28 @@
+"""order leases for multi-worker execution
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-16 13:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("orders", sa.Column("lease_owner", sa.String(), nullable=True))
+    op.add_column("orders", sa.Column("lease_expires_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("orders", "lease_expires_at")
+    op.drop_column("orders", "lease_owner")
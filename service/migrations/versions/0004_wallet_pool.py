@@ -0,0 +1,31 @@
+"""index for the pre-generated wallet pool
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-16 13:30:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_wallets_pool",
+        "wallets",
+        ["id"],
+        postgresql_where=sa.text("user_id IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_wallets_pool", table_name="wallets")
@@ -0,0 +1,47 @@
+"""swap outbox and EXECUTING orders
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-16 14:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, Sequence[str], None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "swap_intents",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("message_hash", sa.String(), nullable=False),
+        sa.Column("wallet_id", sa.Integer(), nullable=False),
+        sa.Column("seqno", sa.Integer(), nullable=False),
+        sa.Column("valid_until", sa.Integer(), nullable=False),
+        sa.Column("boc", sa.Text(), nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(), server_default=sa.func.now(), nullable=False
+        ),
+        sa.ForeignKeyConstraint(["wallet_id"], ["wallets.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("message_hash"),
+    )
+    op.create_index(
+        "ix_orders_executing",
+        "orders",
+        ["tx_hash"],
+        postgresql_where=sa.text("status = 'EXECUTING'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_orders_executing", table_name="orders")
+    op.drop_table("swap_intents")
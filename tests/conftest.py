@@ -0,0 +1,26 @@
+import pytest
+
+from service.app.trigger_book import BookOrder
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def book_order():
+    """Фабрика ордеров индекса срабатывания: BUY жетона EQ-jetton."""
+
+    def make(order_id: int, price: float, volume: float = 10.0) -> BookOrder:
+        return BookOrder(
+            id=order_id,
+            order_id=f"order-{order_id}",
+            wallet_id=1,
+            jetton_address="EQ-jetton",
+            order_type="BUY",
+            price=price,
+            volume=volume,
+        )
+
+    return make
@@ -0,0 +1,79 @@
+import pytest
+
+from service.app.config import settings
+from service.app.poll_schedule import PollSchedule
+from service.app.trigger_book import TriggerBook
+
+JETTON = "EQ-jetton"
+KEY = (JETTON, "BUY", 10.0)
+
+
+def next_check(schedule: PollSchedule, key=KEY) -> float:
+    return schedule._due_at[key]
+
+
+@pytest.fixture
+def schedule():
+    schedule = PollSchedule()
+    # Первая проверка ключа - сразу, дальше по расписанию
+    assert schedule.due([KEY], now=0.0) == [KEY]
+    return schedule
+
+
+def test_unknown_volatility_polls_every_tick(schedule):
+    schedule.observe(KEY, 1.0, threshold=2.0, now=0.0)
+
+    assert next_check(schedule) == settings.SCHEDULER.POLL_MIN_INTERVAL
+    assert schedule.is_urgent(KEY)
+
+
+def test_no_pending_level_polls_at_max_interval(schedule):
+    schedule.observe(KEY, 1.0, threshold=None, now=0.0)
+
+    assert next_check(schedule) == settings.SCHEDULER.POLL_MAX_INTERVAL
+    assert not schedule.is_urgent(KEY)
+
+
+def test_flat_price_delay_grows_with_distance(schedule):
+    far_key = (JETTON, "BUY", 20.0)
+    schedule.due([KEY, far_key], now=0.0)
+    for now in (0.0, 10.0):
+        schedule.observe(KEY, 1.0, threshold=1.001, now=now)
+        schedule.observe(far_key, 1.0, threshold=1.01, now=now)
+
+    near = next_check(schedule) - 10.0
+    far = next_check(schedule, far_key) - 10.0
+    # Цена не менялась, но близкий уровень проверяется чаще далекого
+    assert settings.SCHEDULER.POLL_MIN_INTERVAL < near < far
+    assert far == settings.SCHEDULER.POLL_MAX_INTERVAL
+
+
+def test_level_at_or_below_last_price_resets(schedule, book_order):
+    book = TriggerBook()
+    book.load([book_order(1, 5.0)])
+    book.pop_dirty()
+    schedule.observe(KEY, 2.0, threshold=5.0, now=0.0)
+    schedule.observe(KEY, 2.0, threshold=5.0, now=10.0)
+    assert schedule.due([KEY], now=10.0) == []
+
+    # Новый ордер уже достигнут котировкой: ближайший уровень прежний (5.0)
+    book.upsert(book_order(2, 1.5))
+    for key, min_price in book.pop_dirty().items():
+        schedule.level_changed(key, min_price, book.nearest_level)
+
+    assert schedule.due([KEY], now=10.0) == [KEY]
+
+
+def test_unchanged_nearest_level_keeps_schedule(schedule, book_order):
+    book = TriggerBook()
+    book.load([book_order(1, 5.0)])
+    schedule.observe(KEY, 2.0, threshold=5.0, now=0.0)
+    schedule.observe(KEY, 2.0, threshold=5.0, now=10.0)
+
+    book.upsert(book_order(2, 7.0))
+    schedule.level_changed(KEY, 7.0, book.nearest_level)
+    assert schedule.due([KEY], now=10.0) == []
+
+    book.upsert(book_order(3, 3.0))
+    schedule.level_changed(KEY, 3.0, book.nearest_level)
+    assert schedule.due([KEY], now=10.0) == [KEY]
@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from service.app.quotes import QuoteCoalescer, QuoteCurveCache, sample_volumes
+
+
+class FakePriceClient:
+    """Котировка растет с объемом; неположительный объем ston.fi отвергает."""
+
+    def __init__(self):
+        self.requests = 0
+
+    async def get_current_price(self, jetton_address, order_type, amount):
+        self.requests += 1
+        if amount <= 0:
+            raise ValueError("bad volume")
+        return 1.0 + amount / 1000
+
+
+def test_sample_volumes_is_geometric_and_covers_range():
+    volumes = sample_volumes(1.0, 16.0, 5)
+    assert volumes[0] == 1.0 and volumes[-1] == 16.0
+    assert volumes == pytest.approx([1.0, 2.0, 4.0, 8.0, 16.0])
+
+
+def test_bad_volume_does_not_break_market_curve():
+    cache = QuoteCurveCache(QuoteCoalescer(FakePriceClient()))
+    keys = [("J", "BUY", 0.0), ("J", "BUY", -1.0), ("J", "BUY", 1.0), ("J", "BUY", 5.0)]
+
+    prices = asyncio.run(cache.get_prices(keys))
+
+    assert isinstance(prices[("J", "BUY", 0.0)], ValueError)
+    assert isinstance(prices[("J", "BUY", -1.0)], ValueError)
+    assert prices[("J", "BUY", 1.0)] == pytest.approx(1.001)
+    assert prices[("J", "BUY", 5.0)] == pytest.approx(1.005)
+
+
+def test_curve_spans_live_keys_not_only_due_ones():
+    client = FakePriceClient()
+    coalescer = QuoteCoalescer(client)
+    cache = QuoteCurveCache(coalescer)
+    small, large, other = ("J", "BUY", 1.0), ("J", "BUY", 100.0), ("K", "BUY", 1.0)
+    live = [small, large, other]
+
+    async def tick(due):
+        coalescer.new_tick()
+        return await cache.get_prices(due, live_keys=live)
+
+    async def run():
+        await tick([small, other])
+        built = client.requests
+        # Другой набор ключей к проверке: кривые не перестраиваются и не
+        # вытесняются, на каждый рынок - одна котировка опорного объема
+        prices = await tick([large])
+        assert client.requests - built == 1
+        await tick([other])
+        assert client.requests - built == 2
+        return prices
+
+    prices = asyncio.run(run())
+    assert prices[large] == pytest.approx(1.1)
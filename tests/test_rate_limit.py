@@ -0,0 +1,66 @@
+import asyncio
+
+import httpx
+import pytest
+
+from service.app.circuit_breaker import CLOSED, CircuitBreaker
+from service.app.rate_limit import (
+    ROUTINE,
+    SWAP,
+    QueueTimeout,
+    RateLimiter,
+    priority,
+)
+from service.app.ton_wallet import MyTonClient
+
+pytestmark = pytest.mark.anyio
+
+
+def exhausted_limiter() -> RateLimiter:
+    limiter = RateLimiter("test", rate=1.0, burst=1)
+    limiter._tokens = 0.0
+    return limiter
+
+
+async def test_timed_out_waiter_leaves_the_queue():
+    limiter = exhausted_limiter()
+    with pytest.raises(QueueTimeout):
+        await limiter.acquire(ROUTINE, timeout=0.05)
+
+    # Следующий токен достается оставшемуся ожидающему, а не отброшенному
+    await asyncio.wait_for(limiter.acquire(SWAP), 2.0)
+    assert limiter._waiters == []
+
+
+async def test_routine_request_is_shed_without_breaker_failure():
+    ton_client = MyTonClient()
+    limiter = exhausted_limiter()
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=60.0)
+    try:
+        with priority(ROUTINE), pytest.raises(QueueTimeout):
+            await ton_client.request(
+                limiter, breaker, "GET", "http://127.0.0.1:9/", deadline=0.05
+            )
+    finally:
+        await ton_client.aclose()
+
+    assert breaker.state == CLOSED
+    assert breaker.available()
+
+
+async def test_swap_request_waits_past_deadline():
+    ton_client = MyTonClient()
+    limiter = exhausted_limiter()
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=60.0)
+    transport = httpx.MockTransport(lambda request: httpx.Response(200))
+    await ton_client.http.aclose()
+    ton_client.http = httpx.AsyncClient(transport=transport)
+    try:
+        with priority(SWAP):
+            response = await ton_client.request(
+                limiter, breaker, "GET", "http://test/", deadline=0.05
+            )
+    finally:
+        await ton_client.aclose()
+
+    assert response.status_code == 200
@@ -0,0 +1,26 @@
+import asyncio
+from types import SimpleNamespace
+
+from service.app.metrics import metrics
+from service.app.security import encrypt_private_key
+from service.app.ton_wallet import MyTonClient, generate_wallet
+
+
+def test_concurrent_restores_share_one_derivation():
+    async def scenario():
+        client = MyTonClient()
+        generated = generate_wallet()
+        record = SimpleNamespace(
+            id=1, mnemonic=encrypt_private_key(", ".join(generated["mnemonic"]))
+        )
+        before = metrics.get("wallet_derivations")
+        wallets = await asyncio.gather(
+            *(client.restore_wallet(record) for _ in range(5))
+        )
+        await client.aclose()
+        return wallets, metrics.get("wallet_derivations") - before, generated
+
+    wallets, derivations, generated = asyncio.run(scenario())
+
+    assert derivations == 1
+    assert {wallet.address.to_str() for wallet in wallets} == {generated["address"]}
@@ -0,0 +1,259 @@
+"""
+Число SQL-запросов каждого маршрута заказов и кошельков и поведение маршрутов
+изменения ордера, когда он уходит на исполнение после чтения.
+
+Нужен Postgres из docker-compose (настройки DATABASE_*); если он недоступен,
+тесты пропускаются. Все данные создаются во внешней транзакции соединения и
+откатываются после теста, маршруты работают в SAVEPOINT внутри нее.
+"""
+
+import datetime
+import uuid
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import event, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from service.app.database import DATABASE_URL, get_db
+from service.app.models import Base, Order, User, Wallet
+from service.app.routes import order as order_routes
+from service.app.routes.order import router as order_router
+from service.app.routes.wallet import router as wallet_router
+from service.app.schemas import OrderStatus
+from service.app.security import encrypt_private_key
+
+pytestmark = pytest.mark.anyio
+
+# Служебные запросы сессии внутри внешней транзакции теста
+SAVEPOINT_PREFIXES = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+
+
+@pytest.fixture
+async def connection():
+    engine = create_async_engine(DATABASE_URL, poolclass=NullPool)
+    try:
+        conn = await engine.connect()
+    except Exception as e:
+        await engine.dispose()
+        pytest.skip(f"Postgres недоступен: {e}")
+    transaction = await conn.begin()
+    await conn.run_sync(Base.metadata.create_all)
+    try:
+        yield conn
+    finally:
+        await transaction.rollback()
+        await conn.close()
+        await engine.dispose()
+
+
+@pytest.fixture
+async def seeded(connection):
+    async with AsyncSession(
+        bind=connection,
+        join_transaction_mode="create_savepoint",
+        expire_on_commit=False,
+    ) as session:
+        user = User(telegram_user_id=f"test-{uuid.uuid4().hex}")
+        wallet = Wallet(
+            address=f"EQ-test-{uuid.uuid4().hex}",
+            private_key=encrypt_private_key("private"),
+            mnemonic=encrypt_private_key(", ".join(["word"] * 24)),
+            owner=user,
+        )
+        order = Order(
+            order_type="BUY",
+            price=1.0,
+            volume=2.0,
+            jetton_address="EQ-jetton",
+            status=OrderStatus.CREATED.value,
+            wallet=wallet,
+        )
+        session.add_all([user, wallet, order])
+        await session.commit()
+        return user.telegram_user_id, order.order_id
+
+
+@pytest.fixture
+async def client(connection):
+    app = FastAPI()
+    app.include_router(wallet_router, prefix="/api")
+    app.include_router(order_router, prefix="/api")
+
+    async def override_get_db():
+        async with AsyncSession(
+            bind=connection,
+            join_transaction_mode="create_savepoint",
+            expire_on_commit=False,
+        ) as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        yield c
+
+
+@pytest.fixture
+def statements(connection):
+    executed = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        if not statement.lstrip().upper().startswith(SAVEPOINT_PREFIXES):
+            executed.append(statement)
+
+    sync_engine = connection.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", before_cursor_execute)
+    yield executed
+    event.remove(sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+def user_lookups(executed):
+    return [s for s in executed if "FROM users" in s]
+
+
+async def call(client, statements, method, url, **kwargs):
+    statements.clear()
+    response = await client.request(method, url, **kwargs)
+    assert response.status_code == 200, response.text
+    return list(statements)
+
+
+async def test_get_order_is_one_query(client, seeded, statements):
+    telegram_user_id, order_id = seeded
+    executed = await call(
+        client, statements, "GET", f"/api/orders/{telegram_user_id}/{order_id}"
+    )
+    assert len(executed) == 1, executed
+
+
+async def test_list_orders(client, seeded, statements):
+    telegram_user_id, _ = seeded
+    executed = await call(client, statements, "GET", f"/api/orders/{telegram_user_id}")
+    # Кошелек пользователя и страница ордеров
+    assert len(executed) == 2, executed
+    assert len(user_lookups(executed)) == 1, executed
+
+
+async def test_create_order(client, seeded, statements):
+    telegram_user_id, _ = seeded
+    executed = await call(
+        client,
+        statements,
+        "POST",
+        f"/api/orders/{telegram_user_id}",
+        json={"order_type": "SELL", "price": 3.0, "volume": 1.0},
+    )
+    # Кошелек, INSERT, pg_notify и refresh после commit
+    assert len(executed) == 4, executed
+    assert len(user_lookups(executed)) == 1, executed
+
+
+async def test_update_order(client, seeded, statements):
+    telegram_user_id, order_id = seeded
+    executed = await call(
+        client,
+        statements,
+        "PUT",
+        f"/api/orders/{telegram_user_id}/{order_id}",
+        json={"price": 5.0},
+    )
+    # Ордер, UPDATE ... RETURNING и pg_notify
+    assert len(executed) == 3, executed
+    assert len(user_lookups(executed)) == 1, executed
+
+
+async def test_delete_order(client, seeded, statements):
+    telegram_user_id, order_id = seeded
+    executed = await call(
+        client, statements, "DELETE", f"/api/orders/{telegram_user_id}/{order_id}"
+    )
+    # Ордер, DELETE и pg_notify
+    assert len(executed) == 3, executed
+    assert len(user_lookups(executed)) == 1, executed
+
+
+async def test_existing_wallet_is_one_query(client, seeded, statements):
+    telegram_user_id, _ = seeded
+    executed = await call(
+        client, statements, "GET", f"/api/wallet/create/{telegram_user_id}"
+    )
+    assert len(executed) == 1, executed
+
+
+async def test_export_wallet_is_one_query(client, seeded, statements):
+    telegram_user_id, _ = seeded
+    executed = await call(
+        client, statements, "GET", f"/api/wallet/export/{telegram_user_id}"
+    )
+    assert len(executed) == 1, executed
+
+
+@pytest.fixture
+def executed_after_read(monkeypatch):
+    """Ордер переходит в EXECUTING сразу после того, как маршрут его прочитал."""
+    resolve_order = order_routes.resolve_order
+
+    async def resolve_then_execute(db, telegram_user_id, order_id):
+        order = await resolve_order(db, telegram_user_id, order_id)
+        await db.execute(
+            update(Order)
+            .where(Order.id == order.id)
+            .values(status=OrderStatus.EXECUTING.value)
+            .execution_options(synchronize_session=False)
+        )
+        return order
+
+    monkeypatch.setattr(order_routes, "resolve_order", resolve_then_execute)
+
+
+async def test_delete_of_executing_order_conflicts(client, seeded, executed_after_read):
+    telegram_user_id, order_id = seeded
+    response = await client.delete(f"/api/orders/{telegram_user_id}/{order_id}")
+    assert response.status_code == 409, response.text
+
+
+async def test_update_of_executing_order_conflicts(client, seeded, executed_after_read):
+    telegram_user_id, order_id = seeded
+    response = await client.put(
+        f"/api/orders/{telegram_user_id}/{order_id}", json={"price": 5.0}
+    )
+    assert response.status_code == 409, response.text
+
+
+async def test_orders_are_listed_newest_first(client, connection, seeded):
+    telegram_user_id, oldest_id = seeded
+    async with AsyncSession(
+        bind=connection,
+        join_transaction_mode="create_savepoint",
+        expire_on_commit=False,
+    ) as session:
+        wallet = await session.scalar(
+            select(Order.wallet_id).where(Order.order_id == oldest_id)
+        )
+        newer = [
+            Order(
+                order_type="BUY",
+                price=1.0,
+                volume=2.0,
+                jetton_address="EQ-jetton",
+                status=OrderStatus.CREATED.value,
+                wallet_id=wallet,
+                timestamp=datetime.datetime.utcnow() + datetime.timedelta(minutes=i),
+            )
+            for i in (1, 2)
+        ]
+        session.add_all(newer)
+        await session.commit()
+        expected = [newer[1].order_id, newer[0].order_id, oldest_id]
+
+    url = f"/api/orders/{telegram_user_id}"
+    first = (await client.get(url, params={"limit": 2})).json()
+    second = (
+        await client.get(url, params={"limit": 2, "cursor": first["next_cursor"]})
+    ).json()
+
+    assert [o["order_id"] for o in first["items"] + second["items"]] == expected
+    assert first["has_more"] and not second["has_more"]
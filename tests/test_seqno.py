@@ -0,0 +1,63 @@
+import pytest
+
+from service.app.seqno import SeqnoManager
+
+pytestmark = pytest.mark.anyio
+
+ADDRESS = "EQ-wallet"
+
+
+class FakeAddress:
+    def to_str(self) -> str:
+        return ADDRESS
+
+
+class FakeWallet:
+    address = FakeAddress()
+    client = None
+
+
+@pytest.fixture
+def chain(monkeypatch):
+    chain = {"seqno": 5}
+
+    async def chain_seqno(client, address):
+        return chain["seqno"]
+
+    monkeypatch.setattr(SeqnoManager, "chain_seqno", staticmethod(chain_seqno))
+    return chain
+
+
+async def reserve_many(manager: SeqnoManager, count: int):
+    seqnos = []
+    for _ in range(count):
+        async with manager.reserve(FakeWallet()) as seqno:
+            seqnos.append(seqno)
+    return seqnos
+
+
+async def test_confirm_prunes_inflight_up_to_seqno(chain):
+    manager = SeqnoManager(timeout=60.0)
+    assert await reserve_many(manager, 3) == [5, 6, 7]
+
+    manager.confirm(ADDRESS, 6)
+
+    assert list(manager._states[ADDRESS].inflight) == [7]
+    assert await reserve_many(manager, 1) == [8]
+
+
+async def test_confirmed_wallet_does_not_resync(chain):
+    manager = SeqnoManager(timeout=0.0)
+    await reserve_many(manager, 2)
+    manager.confirm(ADDRESS, 6)
+    # Все отправленные подтверждены: просроченных inflight нет, цепь не нужна
+    chain["seqno"] = 0
+
+    assert await reserve_many(manager, 1) == [7]
+
+
+async def test_confirm_of_unknown_wallet_is_ignored():
+    manager = SeqnoManager(timeout=60.0)
+    manager.confirm(ADDRESS, 3)
+
+    assert ADDRESS not in manager._states
@@ -0,0 +1,60 @@
+from service.app.trigger_book import TriggerBook
+
+JETTON = "EQ-jetton"
+KEY = (JETTON, "BUY", 10.0)
+
+
+def test_crossed_returns_orders_at_or_below_quote(book_order):
+    book = TriggerBook()
+    book.load([book_order(1, 1.0), book_order(2, 2.0), book_order(3, 3.0)])
+
+    assert [order.id for order in book.crossed(KEY, 2.0)] == [1, 2]
+    assert book.nearest_level(KEY, 2.0) == 3.0
+    assert book.nearest_level(KEY, 3.0) is None
+
+
+def test_upsert_moves_order_between_keys(book_order):
+    book = TriggerBook()
+    book.load([book_order(1, 1.0)])
+    book.upsert(book_order(1, 1.0, volume=20.0))
+
+    assert list(book.quote_keys()) == [(JETTON, "BUY", 20.0)]
+    assert book.crossed(KEY, 5.0) == []
+
+
+def test_reload_replays_changes_made_while_reading_snapshot(book_order):
+    book = TriggerBook()
+    book.load([book_order(1, 1.0), book_order(2, 2.0)])
+
+    book.begin_load()
+    # Снимок прочитан до этих событий: в нем еще старые ордера 1 и 2
+    snapshot = [book_order(1, 1.0), book_order(2, 2.0)]
+    book.upsert(book_order(3, 3.0))
+    book.upsert(book_order(1, 5.0))
+    book.remove(2)
+    book.load(snapshot)
+
+    assert len(book) == 2
+    assert 2 not in book
+    assert book.nearest_level(KEY, 0.0) == 3.0
+    assert [order.id for order in book.crossed(KEY, 5.0)] == [3, 1]
+
+
+def test_cancelled_reload_stops_recording(book_order):
+    book = TriggerBook()
+    book.begin_load()
+    book.upsert(book_order(1, 1.0))
+    book.cancel_load()
+    book.load([])
+
+    assert len(book) == 0
+
+
+def test_pop_dirty_keeps_minimum_upserted_price(book_order):
+    book = TriggerBook()
+    book.upsert(book_order(1, 3.0))
+    book.upsert(book_order(2, 1.0))
+    book.upsert(book_order(3, 2.0, volume=20.0))
+
+    assert book.pop_dirty() == {KEY: 1.0, (JETTON, "BUY", 20.0): 2.0}
+    assert book.pop_dirty() == {}